@@ -1,6 +1,11 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
+from imprint.core.metrics import StageMetrics
+
 from .container import ApiContainer
+from .metrics import StageTimingMiddleware, metrics_router
 from .routers.api.v1._router import api_v1_router
 from .settings import ApiSettings
 
@@ -10,10 +15,24 @@ def create_app(container: ApiContainer | None = None) -> FastAPI:
         container = ApiContainer()
         container.settings.from_pydantic(ApiSettings())
 
-    app = FastAPI(title="ImPrint API", version="0.1.0")
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Воркеры исполнителя поднимаются при старте, а не на первом запросе
+        executor = container.core_container.controllers.executor()
+        await executor.start()
+        yield
+        await executor.shutdown()
+
+    app = FastAPI(title="ImPrint API", version="0.1.0", lifespan=lifespan)
 
     app.container = container
 
     app.include_router(api_v1_router)
 
+    # Замер этапов включается настройкой: без нее нет ни middleware, ни /metrics
+    if container.core_container.settings.metrics_enabled():
+        app.stage_metrics = StageMetrics()
+        app.add_middleware(StageTimingMiddleware, stage_metrics=app.stage_metrics)
+        app.include_router(metrics_router)
+
     return app
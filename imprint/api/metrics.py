@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from imprint.core.metrics import StageMetrics, collect, server_timing
+
+metrics_router = APIRouter(tags=["Metrics"])
+
+
+class StageTimingMiddleware:
+    """
+    Включает замер этапов на время запроса: длительности уходят в заголовок Server-Timing
+    и в гистограммы. Этапы после отправки заголовков (кодирование PNG при потоковой отдаче)
+    попадают только в гистограммы.
+    """
+
+    def __init__(self, app: ASGIApp, stage_metrics: StageMetrics):
+        self.app = app
+        self.stage_metrics = stage_metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with collect() as stages:
+
+            async def send_with_timing(message: Message) -> None:
+                if message["type"] == "http.response.start" and stages:
+                    MutableHeaders(scope=message).append("Server-Timing", server_timing(stages))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                self.stage_metrics.observe(stages)
+
+
+@metrics_router.get("/metrics", name="metrics", include_in_schema=False)
+async def metrics(request: Request):
+    return PlainTextResponse(
+        request.app.stage_metrics.render(),
+        media_type="text/plain; version=0.0.4",
+    )
@@ -1,4 +1,4 @@
-from fastapi import Request, Depends
+from fastapi import Request
 
 from imprint.api.container import ApiContainer
 from imprint.core.container import CoreContainer
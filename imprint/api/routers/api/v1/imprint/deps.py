@@ -1,11 +1,39 @@
+from typing import Annotated
+
 from fastapi import Depends
 
 from imprint.api.routers.api.v1.deps import core_container_dep
 from imprint.core.container import CoreContainer
+from imprint.core.controllers.executor.base import ExecutorBase
+from imprint.core.controllers.image_encoder.base import ImageEncoderController
 from imprint.core.controllers.imprint import ImprintController
 
 
 def imprint_controller_dep(
-    core_container: CoreContainer = Depends(core_container_dep),
+    core_container: Annotated[CoreContainer, Depends(core_container_dep)],
 ) -> ImprintController:
     return core_container.controllers.imprint()
+
+
+def image_encoder_dep(
+    core_container: Annotated[CoreContainer, Depends(core_container_dep)],
+) -> ImageEncoderController:
+    return core_container.controllers.image_encoder()
+
+
+def executor_dep(
+    core_container: Annotated[CoreContainer, Depends(core_container_dep)],
+) -> ExecutorBase:
+    return core_container.controllers.executor()
+
+
+def max_text_bytes_dep(
+    core_container: Annotated[CoreContainer, Depends(core_container_dep)],
+) -> int:
+    return core_container.settings.upload_max_text_bytes() or 0
+
+
+def max_upload_bytes_dep(
+    core_container: Annotated[CoreContainer, Depends(core_container_dep)],
+) -> int:
+    return core_container.settings.parse_max_upload_bytes() or 0
@@ -1,9 +1,28 @@
-from pydantic import BaseModel
+from typing import Literal
+
+from pydantic import BaseModel, Field, model_validator
 
 
 class CreateImprintRequest(BaseModel):
     text: str
     password: str | None = None
+    # svg — только для отображения: без растеризации и без встроенного текста
+    format: Literal["png", "svg"] = "png"
+    # Превью size × size для отображения: рисуется сразу в этом размере и не содержит текста
+    size: int | None = Field(default=None, ge=16, le=1000)
+    # Идентификатор документа, который дописывается в конец: повторный запрос анализирует только новую часть
+    document_id: str | None = Field(default=None, max_length=128)
+
+    @model_validator(mode="after")
+    def check_display_only(self) -> "CreateImprintRequest":
+        # Превью и SVG не содержат текста: пароль некуда встроить, и молча его терять нельзя
+        if self.password is not None and (self.size is not None or self.format == "svg"):
+            raise ValueError("Preview and SVG do not carry data, password is not allowed")
+        return self
+
+
+class CreateImprintBatchRequest(BaseModel):
+    items: list[CreateImprintRequest] = Field(min_length=1, max_length=100)
 
 
 class ParseImprintResponse(BaseModel):
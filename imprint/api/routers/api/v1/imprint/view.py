@@ -1,38 +1,182 @@
-import io
 from http import HTTPStatus
-from io import BytesIO
-from typing import Annotated
-
-from fastapi import APIRouter, Depends, File, Form, HTTPException, Response, UploadFile
-from fastapi.concurrency import run_in_threadpool
-from PIL import Image
+from tempfile import SpooledTemporaryFile
+from typing import Annotated, AsyncIterator, BinaryIO
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Form,
+    Header,
+    HTTPException,
+    Request,
+    UploadFile,
+)
+from fastapi.responses import Response, StreamingResponse
 
-from imprint.api.routers.api.v1.imprint.deps import imprint_controller_dep
+from imprint.api.routers.api.v1.imprint.deps import (
+    executor_dep,
+    image_encoder_dep,
+    max_text_bytes_dep,
+    max_upload_bytes_dep,
+)
 from imprint.api.routers.api.v1.imprint.schemas import (
+    CreateImprintBatchRequest,
     CreateImprintRequest,
     ParseImprintResponse,
 )
-from imprint.core.controllers.imprint import ImprintController
+from imprint.core.controllers.executor.base import (
+    SPOOL_MAX_MEMORY,
+    ExecutorBase,
+    ExecutorSaturatedError,
+)
+from imprint.core.controllers.image_encoder.base import ImageEncoderController
+from imprint.core.controllers.imprint import ImageTooLargeError
 
 imprint_router = APIRouter(prefix="/imprint", tags=["Imprint"])
 
 
+def _upload_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+        detail="Upload is too large",
+    )
+
+
+def _check_content_length(request: Request, max_upload_bytes: int) -> None:
+    content_length = request.headers.get("content-length", "")
+    if max_upload_bytes and content_length.isdigit() and int(content_length) > max_upload_bytes:
+        raise _upload_too_large()
+
+
+async def _read_body(request: Request, max_upload_bytes: int) -> AsyncIterator[bytes]:
+    """Непустые куски тела; больше max_upload_bytes (0 — без предела) — 413, даже без Content-Length."""
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if max_upload_bytes and size > max_upload_bytes:
+            raise _upload_too_large()
+        if chunk:
+            yield chunk
+
+
 @imprint_router.post("", name="create_imprint")
 async def create_imprint(
     request: CreateImprintRequest,
-    imprint_controller: ImprintController = Depends(imprint_controller_dep),
+    executor: Annotated[ExecutorBase, Depends(executor_dep)],
+    image_encoder: Annotated[ImageEncoderController, Depends(image_encoder_dep)],
+):
+    try:
+        if request.format == "svg":
+            return Response(await executor.create_svg(request.text, request.size), media_type="image/svg+xml")
+
+        if request.size is not None:
+            image = await executor.create_preview(request.text, request.size)
+        else:
+            image = await executor.create(request.text, request.password, request.document_id)
+    except ExecutorSaturatedError:
+        raise HTTPException(
+            status_code=HTTPStatus.TOO_MANY_REQUESTS,
+            detail="Too many requests",
+        ) from None
+
+    # PNG кодируется в отдельном потоке и уходит клиенту кусками по мере сжатия
+    return StreamingResponse(image_encoder.iter_png(image), media_type="image/png")
+
+
+@imprint_router.post("/upload", name="upload_imprint")
+async def upload_imprint(
+    request: Request,
+    executor: Annotated[ExecutorBase, Depends(executor_dep)],
+    image_encoder: Annotated[ImageEncoderController, Depends(image_encoder_dep)],
+    max_text_bytes: Annotated[int, Depends(max_text_bytes_dep)],
+    password: Annotated[str | None, Header(alias="X-Imprint-Password")] = None,
+):
+    """Текст передается сырым телом text/plain (UTF-8), а не JSON-строкой."""
+    media_type, _, params = request.headers.get("content-type", "").partition(";")
+    charset = params.strip().removeprefix("charset=").lower() or "utf-8"
+    if media_type.strip() != "text/plain" or charset not in ("utf-8", "utf8"):
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail="Invalid content type",
+        )
+
+    _check_content_length(request, max_text_bytes)
+
+    # Куски тела уходят в анализ по мере чтения из сокета, без склейки в одну строку
+    try:
+        image = await executor.create_from_stream(_read_body(request, max_text_bytes), password)
+    except ExecutorSaturatedError:
+        raise HTTPException(
+            status_code=HTTPStatus.TOO_MANY_REQUESTS,
+            detail="Too many requests",
+        ) from None
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail="Invalid text encoding",
+        ) from None
+
+    return StreamingResponse(image_encoder.iter_png(image), media_type="image/png")
+
+
+@imprint_router.post("/batch", name="create_imprint_batch")
+async def create_imprint_batch(
+    request: CreateImprintBatchRequest,
+    executor: Annotated[ExecutorBase, Depends(executor_dep)],
+    image_encoder: Annotated[ImageEncoderController, Depends(image_encoder_dep)],
 ):
+    if any(item.format != "png" or item.size is not None for item in request.items):
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail="Batch supports full-size PNG only",
+        )
+    # Пакет не сохраняет состояние документов, поэтому document_id не игнорируется молча, а отклоняется
+    if any(item.document_id is not None for item in request.items):
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail="Batch does not support document_id",
+        )
 
-    image = await run_in_threadpool(
-        imprint_controller.create,
-        text=request.text,
-        password=request.password,
+    try:
+        images = await executor.create_many(
+            [item.text for item in request.items],
+            [item.password for item in request.items],
+        )
+    except ExecutorSaturatedError:
+        raise HTTPException(
+            status_code=HTTPStatus.TOO_MANY_REQUESTS,
+            detail="Too many requests",
+        ) from None
+
+    # Отпечатки уходят ZIP-архивом в порядке запроса: 0000.png, 0001.png, ...
+    return StreamingResponse(
+        image_encoder.iter_zip((f"{index:04d}.png", image) for index, image in enumerate(images)),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="imprints.zip"'},
     )
 
-    buffer = BytesIO()
-    image.save(buffer, format="PNG")
 
-    return Response(content=buffer.getvalue(), media_type="image/png")
+async def _parse(executor: ExecutorBase, fp: BinaryIO, password: str | None) -> ParseImprintResponse:
+    try:
+        text = await executor.parse(fp, password)
+    except ExecutorSaturatedError:
+        raise HTTPException(
+            status_code=HTTPStatus.TOO_MANY_REQUESTS,
+            detail="Too many requests",
+        ) from None
+    except ImageTooLargeError:
+        raise HTTPException(
+            status_code=HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+            detail="Image is too large",
+        ) from None
+    except Exception as e:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail="Invalid image",
+        ) from e
+
+    return ParseImprintResponse(text=text)
 
 
 @imprint_router.post(
@@ -41,30 +185,51 @@ async def create_imprint(
     response_model=ParseImprintResponse,
 )
 async def parse_imprint(
+    request: Request,
     file: Annotated[UploadFile, File()],
+    executor: Annotated[ExecutorBase, Depends(executor_dep)],
+    max_upload_bytes: Annotated[int, Depends(max_upload_bytes_dep)],
     password: Annotated[str | None, Form()] = None,
-    imprint_controller: ImprintController = Depends(imprint_controller_dep),
 ):
     if file.content_type != "image/png":
         raise HTTPException(
             status_code=HTTPStatus.BAD_REQUEST,
             detail="Invalid content type",
         )
+    _check_content_length(request, max_upload_bytes)
+    if max_upload_bytes and (file.size or 0) > max_upload_bytes:
+        raise _upload_too_large()
 
-    content = await file.read()
-
-    try:
-        image = Image.open(io.BytesIO(content))
-        image.verify()
-
-        image = Image.open(io.BytesIO(content))
-
-        text = imprint_controller.parse(image, password)
+    # Файл уже лежит во временном файле multipart-парсера: передаем его как есть, без чтения в память
+    return await _parse(executor, file.file, password)
 
-        return ParseImprintResponse(text=text)
 
-    except Exception:
+@imprint_router.post(
+    "/parse/raw",
+    name="parse_imprint_raw",
+    response_model=ParseImprintResponse,
+)
+async def parse_imprint_raw(
+    request: Request,
+    executor: Annotated[ExecutorBase, Depends(executor_dep)],
+    max_upload_bytes: Annotated[int, Depends(max_upload_bytes_dep)],
+    password: Annotated[str | None, Header(alias="X-Imprint-Password")] = None,
+):
+    """PNG передается сырым телом image/png, пароль — заголовком."""
+    if request.headers.get("content-type", "").partition(";")[0].strip() != "image/png":
         raise HTTPException(
             status_code=HTTPStatus.BAD_REQUEST,
-            detail="Invalid image",
+            detail="Invalid content type",
         )
+    _check_content_length(request, max_upload_bytes)
+
+    # Тело пишется во временный файл по мере чтения из сокета; большие загрузки уходят на диск
+    upload = UploadFile(SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY))
+    try:
+        async for chunk in _read_body(request, max_upload_bytes):
+            await upload.write(chunk)
+        await upload.seek(0)
+
+        return await _parse(executor, upload.file, password)
+    finally:
+        await upload.close()
@@ -0,0 +1,129 @@
+import io
+import random
+from typing import Any, Callable
+
+from PIL import Image, ImageDraw
+
+from imprint.core.container import CoreContainer
+from imprint.core.controllers.graphic_engine.drawers.core import CoreDrawer
+from imprint.core.controllers.graphic_engine.drawers.crystal import CrystalDrawer
+from imprint.core.controllers.graphic_engine.drawers.flow import FlowDrawer
+from imprint.core.controllers.graphic_engine.drawers.genesis import GenesisDrawer
+from imprint.core.controllers.graphic_engine.drawers.kaleidoscope import (
+    KaleidoscopeDrawer,
+)
+from imprint.core.settings import Settings
+
+# Размеры текстов в байтах: от слова до книги
+TEXT_SIZES = {
+    "word": 8,
+    "sentence": 100,
+    "paragraph": 1_000,
+    "article": 30_000,
+    "book": 1_000_000,
+}
+CANVAS_SIZES = [1000, 2000, 4000, 8000]
+
+DRAWERS = {
+    drawer.name: drawer
+    for drawer in (CrystalDrawer(), CoreDrawer(), FlowDrawer(), KaleidoscopeDrawer(), GenesisDrawer())
+}
+
+PASSWORD = "benchmark"
+
+_WORDS = (
+    "отпечаток текст картинка пароль данные слово символ холст слой луч цвет "
+    "imprint text image password data word symbol canvas layer ray color"
+).split()
+
+
+def make_text(size: int) -> str:
+    """Детерминированный текст из словаря примерно `size` байт UTF-8."""
+    rnd = random.Random(size)
+    words, length = [], 0
+    while length < size:
+        word = rnd.choice(_WORDS)
+        words.append(word)
+        length += len(word.encode("utf-8")) + 1
+
+    return " ".join(words).encode("utf-8")[:size].decode("utf-8", errors="ignore")
+
+
+def make_controllers():
+    """Контроллеры без кэшей: каждый повтор выполняет всю работу заново."""
+    settings = Settings(
+        render_cache_max_bytes=0,
+        geometry_cache_max_bytes=0,
+        kdf_key_cache_size=0,
+    )
+    return CoreContainer(settings=settings.model_dump()).controllers
+
+
+def _draw_settings(controllers, text_size: str, canvas_size: int):
+    metrics = controllers.text_analyzer().analyze(make_text(TEXT_SIZES[text_size]))
+    return controllers.imprint()._draw_settings(metrics).replace(canvas_size=canvas_size)
+
+
+def _analyze(controllers, text: str) -> Callable[[], Any]:
+    text_analyzer = controllers.text_analyzer()
+    text_value = make_text(TEXT_SIZES[text])
+    return lambda: text_analyzer.analyze(text_value)
+
+
+def _drawer(controllers, drawer: str, text: str, canvas: int) -> Callable[[], Any]:
+    draw_settings = _draw_settings(controllers, text, canvas)
+    overlay = Image.new("RGBA", (canvas, canvas), (0, 0, 0, 0))
+
+    def run():
+        overlay.paste((0, 0, 0, 0), (0, 0, canvas, canvas))
+        DRAWERS[drawer].draw(ImageDraw.Draw(overlay), draw_settings)
+
+    return run
+
+
+def _engine_draw(controllers, text: str, canvas: int) -> Callable[[], Any]:
+    graphic_engine = controllers.graphic_engine()
+    draw_settings = _draw_settings(controllers, text, canvas)
+    return lambda: graphic_engine.draw(draw_settings)
+
+
+def _stego_encode(controllers, text: str, canvas: int) -> Callable[[], Any]:
+    stego_crypt = controllers.stego_crypt()
+    image = Image.new("RGB", (canvas, canvas), (255, 255, 255))
+    text_value = make_text(TEXT_SIZES[text])
+    return lambda: stego_crypt.encode(image, text_value, PASSWORD)
+
+
+def _stego_decode(controllers, text: str, canvas: int) -> Callable[[], Any]:
+    stego_crypt = controllers.stego_crypt()
+    image = Image.new("RGB", (canvas, canvas), (255, 255, 255))
+    image = stego_crypt.encode(image, make_text(TEXT_SIZES[text]), PASSWORD)
+    return lambda: stego_crypt.decode(image, PASSWORD)
+
+
+def _imprint_create(controllers, text: str) -> Callable[[], Any]:
+    imprint = controllers.imprint()
+    text_value = make_text(TEXT_SIZES[text])
+    return lambda: imprint.create(text_value, PASSWORD)
+
+
+def _imprint_parse(controllers, text: str) -> Callable[[], Any]:
+    imprint = controllers.imprint()
+    buffer = io.BytesIO()
+    controllers.image_encoder().save(imprint.create(make_text(TEXT_SIZES[text]), PASSWORD), buffer)
+    content = buffer.getvalue()
+
+    # Как в API: PNG открывается из байтов и распаковывается только до конца нагрузки
+    return lambda: imprint.parse_file(io.BytesIO(content), PASSWORD)
+
+
+# Этап -> (подготовка, оси матрицы параметров); подготовка не входит в замер и возвращает замеряемую функцию
+STAGES: dict[str, tuple[Callable[..., Callable[[], Any]], dict[str, list]]] = {
+    "text_analyzer.analyze": (_analyze, {"text": list(TEXT_SIZES)}),
+    "drawer": (_drawer, {"drawer": list(DRAWERS), "text": list(TEXT_SIZES), "canvas": CANVAS_SIZES}),
+    "graphic_engine.draw": (_engine_draw, {"text": list(TEXT_SIZES), "canvas": CANVAS_SIZES}),
+    "stego_crypt.encode": (_stego_encode, {"text": list(TEXT_SIZES), "canvas": CANVAS_SIZES}),
+    "stego_crypt.decode": (_stego_decode, {"text": list(TEXT_SIZES), "canvas": CANVAS_SIZES}),
+    "imprint.create": (_imprint_create, {"text": list(TEXT_SIZES)}),
+    "imprint.parse": (_imprint_parse, {"text": list(TEXT_SIZES)}),
+}
@@ -0,0 +1,151 @@
+import gc
+import itertools
+import multiprocessing
+import platform
+import resource
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, Optional
+
+from imprint.benchmark.cases import STAGES, make_controllers
+
+_controllers = None
+
+
+def iter_cases(
+    stages: Optional[Iterable[str]] = None,
+    **filters: Optional[list],
+) -> Iterator[tuple[str, dict]]:
+    """
+    Все сочетания параметров выбранных этапов.
+    filters — значения по осям (text=[...], canvas=[...], drawer=[...]); None — все значения оси.
+    """
+    for stage in stages or STAGES:
+        _, axes = STAGES[stage]
+        values = [
+            [value for value in axis_values if not filters.get(axis) or value in filters[axis]]
+            for axis, axis_values in axes.items()
+        ]
+        for combination in itertools.product(*values):
+            yield stage, dict(zip(axes, combination, strict=True))
+
+
+def case_key(stage: str, params: dict) -> str:
+    return stage + "".join(f" {name}={value}" for name, value in params.items())
+
+
+def _max_rss() -> int:
+    # В Linux ru_maxrss в килобайтах, в macOS — в байтах
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def run_case(stage: str, params: dict, repeat: int) -> dict:
+    """
+    Замеряет один случай. peak_memory — прирост пикового RSS процесса за подготовку и замеры,
+    поэтому честен только в свежем процессе (см. run).
+    """
+    global _controllers
+    if _controllers is None:
+        _controllers = make_controllers()
+
+    result = {"stage": stage, "params": params}
+    rss_before = _max_rss()
+
+    setup, _ = STAGES[stage]
+    try:
+        func = setup(_controllers, **params)
+        times = []
+        for _ in range(repeat):
+            gc.collect()
+            started = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - started)
+    except ValueError as error:
+        # Например, текст не помещается в картинку такого размера
+        result["skipped"] = str(error)
+        return result
+
+    result["time_min"] = min(times)
+    result["time_median"] = statistics.median(times)
+    result["peak_memory"] = _max_rss() - rss_before
+
+    return result
+
+
+def run(
+    cases: Iterable[tuple[str, dict]],
+    repeat: int = 3,
+    isolate: bool = True,
+    on_result=None,
+) -> dict:
+    """
+    isolate — каждый случай в отдельном процессе: пиковый RSS не наследуется от предыдущих случаев.
+    on_result — вызывается с результатом каждого случая по мере готовности.
+    """
+    results = []
+    pool = (
+        ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"), max_tasks_per_child=1)
+        if isolate
+        else None
+    )
+
+    try:
+        for stage, params in cases:
+            if pool is not None:
+                result = pool.submit(run_case, stage, params, repeat).result()
+            else:
+                result = run_case(stage, params, repeat)
+
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(
+    current: dict,
+    baseline: dict,
+    time_threshold: float = 0.2,
+    memory_threshold: float = 0.2,
+) -> list[dict]:
+    """
+    Регрессии относительно базовой линии: время (time_min) или пиковая память
+    выросли больше, чем на threshold (0.2 — на 20%). Случаи без пары в базовой линии пропускаются.
+    """
+    baseline_results = {
+        case_key(result["stage"], result["params"]): result
+        for result in baseline["results"]
+        if "skipped" not in result
+    }
+
+    regressions = []
+    for result in current["results"]:
+        base = baseline_results.get(case_key(result["stage"], result["params"]))
+        if base is None or "skipped" in result:
+            continue
+
+        for metric, threshold in (("time_min", time_threshold), ("peak_memory", memory_threshold)):
+            if base[metric] > 0 and result[metric] > base[metric] * (1 + threshold):
+                regressions.append(
+                    {
+                        "case": case_key(result["stage"], result["params"]),
+                        "metric": metric,
+                        "baseline": base[metric],
+                        "current": result[metric],
+                        "change": result[metric] / base[metric] - 1,
+                    }
+                )
+
+    return regressions
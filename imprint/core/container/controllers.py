@@ -1,7 +1,11 @@
 from dependency_injector import providers
 from dependency_injector.containers import DeclarativeContainer
 
+from imprint.core.controllers.executor.base import ThreadExecutor
+from imprint.core.controllers.executor.process import ProcessExecutor
 from imprint.core.controllers.graphic_engine.base import GraphicEngineController
+from imprint.core.controllers.graphic_engine.cache import GeometryCache, RenderCache
+from imprint.core.controllers.image_encoder.base import ImageEncoderController
 from imprint.core.controllers.imprint import ImprintController
 from imprint.core.controllers.stego_crypt.base import StegoCryptController
 from imprint.core.controllers.text_analyzer.base import TextAnalyzerController
@@ -12,10 +16,58 @@ class ControllersContainer(DeclarativeContainer):
 
     text_analyzer = providers.Singleton(TextAnalyzerController)
     graphic_engine = providers.Singleton(GraphicEngineController)
-    stego_crypt = providers.Singleton(StegoCryptController)
+    render_cache = providers.Singleton(
+        RenderCache,
+        max_bytes=settings.render_cache_max_bytes,
+        cache_dir=settings.render_cache_dir,
+    )
+    geometry_cache = providers.Singleton(
+        GeometryCache,
+        max_bytes=settings.geometry_cache_max_bytes,
+        cache_dir=settings.geometry_cache_dir,
+    )
+    stego_crypt = providers.Singleton(
+        StegoCryptController,
+        kdf_algorithm=settings.kdf_algorithm,
+        kdf_iterations=settings.kdf_iterations,
+        kdf_scrypt_n=settings.kdf_scrypt_n,
+        kdf_scrypt_r=settings.kdf_scrypt_r,
+        kdf_scrypt_p=settings.kdf_scrypt_p,
+        key_cache_size=settings.kdf_key_cache_size,
+        kdf_max_iterations=settings.kdf_max_iterations,
+        kdf_max_scrypt_n=settings.kdf_max_scrypt_n,
+        kdf_max_scrypt_r=settings.kdf_max_scrypt_r,
+        kdf_max_scrypt_p=settings.kdf_max_scrypt_p,
+        compression=settings.stego_compression,
+        max_text_bytes=settings.stego_max_text_bytes,
+    )
+    image_encoder = providers.Singleton(
+        ImageEncoderController,
+        compress_level=settings.png_compress_level,
+        compress_type=settings.png_compress_type,
+    )
     imprint = providers.Singleton(
         ImprintController,
         text_analyzer_controller=text_analyzer,
         graphic_engine_controller=graphic_engine,
         stego_crypt_controller=stego_crypt,
+        render_cache=render_cache,
+        geometry_cache=geometry_cache,
+        max_image_pixels=settings.parse_max_image_pixels,
+        documents_cache_max_bytes=settings.documents_cache_max_bytes,
+    )
+    executor = providers.Selector(
+        settings.executor,
+        thread=providers.Singleton(
+            ThreadExecutor,
+            imprint_controller=imprint,
+            workers=settings.executor_workers,
+            queue_depth=settings.executor_queue_depth,
+        ),
+        process=providers.Singleton(
+            ProcessExecutor,
+            settings=settings,
+            workers=settings.executor_workers,
+            queue_depth=settings.executor_queue_depth,
+        ),
     )
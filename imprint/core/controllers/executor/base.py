@@ -0,0 +1,178 @@
+import asyncio
+import os
+import threading
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterator, BinaryIO, Iterator, Optional
+
+import anyio
+from PIL import Image
+
+from imprint.core.controllers.imprint import ImprintController
+
+# Сколько потокового тела держать в памяти, дальше оно уходит во временный файл
+SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+class ExecutorSaturatedError(Exception):
+    """Все воркеры заняты и очередь ожидания заполнена."""
+
+
+async def spool(chunks: AsyncIterator[bytes], fp: BinaryIO) -> None:
+    """Дописывает тело в файл из event loop и перематывает файл в начало."""
+    afp = anyio.wrap_file(fp)
+    async for chunk in chunks:
+        await afp.write(chunk)
+    await afp.seek(0)
+
+
+def iter_file(fp: BinaryIO) -> Iterator[bytes]:
+    return iter(lambda: fp.read(READ_CHUNK_SIZE), b"")
+
+
+class ExecutorBase:
+    """
+    Исполнитель тяжелых операций ImprintController вне event loop.
+    Одновременно принимается не больше `workers + queue_depth` задач, остальные сразу отклоняются.
+    """
+
+    def __init__(self, workers: Optional[int] = None, queue_depth: Optional[int] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_depth = 64 if queue_depth is None else queue_depth
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_depth)
+
+    def _acquire(self, count: int = 1) -> None:
+        """Занимает count слотов сразу или ни одного."""
+        for taken in range(count):
+            if not self._slots.acquire(blocking=False):
+                self._release(taken)
+                raise ExecutorSaturatedError
+
+    def _release(self, count: int = 1) -> None:
+        for _ in range(count):
+            self._slots.release()
+
+    async def start(self) -> None: ...
+
+    async def shutdown(self) -> None: ...
+
+    async def create(
+        self,
+        text: str,
+        password: Optional[str] = None,
+        document_id: Optional[str] = None,
+    ) -> Image.Image:
+        raise NotImplementedError
+
+    async def create_from_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        password: Optional[str] = None,
+    ) -> Image.Image:
+        """chunks — байты UTF-8 по мере поступления (тело запроса); ошибки итератора пробрасываются как есть."""
+        raise NotImplementedError
+
+    async def create_svg(self, text: str, size: Optional[int] = None) -> str:
+        raise NotImplementedError
+
+    async def create_preview(self, text: str, size: int) -> Image.Image:
+        raise NotImplementedError
+
+    async def create_many(
+        self,
+        texts: list[str],
+        passwords: Optional[list[Optional[str]]] = None,
+    ) -> list[Image.Image]:
+        raise NotImplementedError
+
+    async def parse(self, fp: BinaryIO, password: Optional[str] = None) -> str:
+        """fp — PNG-файл, открытый на чтение; читается в исполнителе, а не в event loop."""
+        raise NotImplementedError
+
+
+class ThreadExecutor(ExecutorBase):
+    """Выполняет задачи в пуле потоков текущего процесса."""
+
+    def __init__(
+        self,
+        imprint_controller: ImprintController,
+        workers: Optional[int] = None,
+        queue_depth: Optional[int] = None,
+    ):
+        super().__init__(workers=workers, queue_depth=queue_depth)
+        self.imprint_controller = imprint_controller
+        self._limiter: Optional[anyio.CapacityLimiter] = None
+
+    @property
+    def limiter(self) -> anyio.CapacityLimiter:
+        # Создается при первом вызове: limiter привязан к event loop
+        if self._limiter is None:
+            self._limiter = anyio.CapacityLimiter(self.workers)
+        return self._limiter
+
+    async def _run(self, func, *args):
+        self._acquire()
+        try:
+            return await anyio.to_thread.run_sync(func, *args, limiter=self.limiter)
+        finally:
+            self._release()
+
+    async def _map(self, func, *iterables) -> list:
+        return await asyncio.gather(
+            *(anyio.to_thread.run_sync(func, *args, limiter=self.limiter) for args in zip(*iterables, strict=True))
+        )
+
+    async def create(
+        self,
+        text: str,
+        password: Optional[str] = None,
+        document_id: Optional[str] = None,
+    ) -> Image.Image:
+        return await self._run(lambda: self.imprint_controller.create(text, password, document_id=document_id))
+
+    async def create_from_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        password: Optional[str] = None,
+    ) -> Image.Image:
+        # Тело читается в event loop, а поток пула занимается только анализом и отрисовкой:
+        # медленный клиент держит слот очереди, но не поток, нужный остальным запросам
+        self._acquire()
+        try:
+            with SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY) as fp:
+                await spool(chunks, fp)
+                return await anyio.to_thread.run_sync(
+                    self.imprint_controller.create_from_stream, iter_file(fp), password, limiter=self.limiter
+                )
+        finally:
+            self._release()
+
+    async def create_svg(self, text: str, size: Optional[int] = None) -> str:
+        return await self._run(lambda: self.imprint_controller.create_svg(text, size=size))
+
+    async def create_preview(self, text: str, size: int) -> Image.Image:
+        return await self._run(self.imprint_controller.create_preview, text, size)
+
+    async def create_many(
+        self,
+        texts: list[str],
+        passwords: Optional[list[Optional[str]]] = None,
+    ) -> list[Image.Image]:
+        # Пакет занимает слот очереди на каждые workers текстов, а его этапы идут через общий limiter:
+        # большой пакет не обходит ограничение числа потоков и не забирает их у одиночных запросов
+        slots = max(1, -(-len(texts) // self.workers))
+        self._acquire(slots)
+        try:
+
+            def map_func(func, *iterables) -> list:
+                return anyio.from_thread.run(self._map, func, *iterables)
+
+            # Сам create_many только раздает этапы и ждет их, поэтому выполняется вне limiter
+            return await anyio.to_thread.run_sync(
+                lambda: self.imprint_controller.create_many(texts, passwords, map_func=map_func)
+            )
+        finally:
+            self._release(slots)
+
+    async def parse(self, fp: BinaryIO, password: Optional[str] = None) -> str:
+        return await self._run(self.imprint_controller.parse_file, fp, password)
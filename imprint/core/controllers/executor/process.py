@@ -0,0 +1,302 @@
+import asyncio
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import AsyncIterator, BinaryIO, Optional
+
+import anyio
+from PIL import Image
+
+from imprint.core import metrics
+from imprint.core.controllers.executor.base import ExecutorBase, iter_file, spool
+from imprint.core.controllers.imprint import ImprintController
+
+# Картинка копируется в разделяемую память полосами, чтобы не держать второй полный буфер
+_BAND_ROWS = 256
+# Размер куска при копировании загруженного PNG во временный файл
+_COPY_BUFFER_SIZE = 1024 * 1024
+# Бюджеты кэшей из настроек: у каждого воркера свои кэши, поэтому бюджет делится между воркерами
+_WORKER_BUDGETS = ("render_cache_max_bytes", "geometry_cache_max_bytes", "documents_cache_max_bytes")
+
+_imprint_controller: Optional[ImprintController] = None
+
+
+def _worker_settings(settings: dict, workers: int) -> dict:
+    """Настройки воркера: общий бюджет каждого кэша делится поровну, 0 (кэш выключен) остается 0."""
+    settings = dict(settings)
+    for name in _WORKER_BUDGETS:
+        if settings.get(name):
+            settings[name] = max(1, settings[name] // workers)
+    return settings
+
+
+def _init_worker(settings: dict) -> None:
+    """Создает синглтоны CoreContainer один раз при старте воркера."""
+    from imprint.core.container import CoreContainer
+
+    global _imprint_controller
+    _imprint_controller = CoreContainer(settings=settings).controllers.imprint()
+
+
+def _warm_up() -> None: ...
+
+
+def _call(collect_stages: bool, func, *args) -> tuple:
+    """Вызывает задачу в воркере; замеры этапов возвращаются вместе с результатом."""
+    if not collect_stages:
+        return func(*args), []
+
+    with metrics.collect() as stages:
+        return func(*args), stages
+
+
+def _image_to_shared_memory(image: Image.Image) -> tuple[str, str, tuple[int, int]]:
+    width, height = image.size
+    row_size = width * len(image.getbands())
+
+    shm = SharedMemory(create=True, size=max(1, row_size * height))
+    try:
+        for top in range(0, height, _BAND_ROWS):
+            bottom = min(height, top + _BAND_ROWS)
+            shm.buf[top * row_size : bottom * row_size] = image.crop((0, top, width, bottom)).tobytes()
+    finally:
+        shm.close()
+
+    return shm.name, image.mode, image.size
+
+
+def _image_from_shared_memory(name: str, mode: str, size: tuple[int, int]) -> Image.Image:
+    shm = SharedMemory(name=name)
+    try:
+        return Image.frombytes(mode, size, shm.buf)
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _discard_shared_memory(future) -> None:
+    if not future.cancelled() and future.exception() is None:
+        (name, _, _), _ = future.result()
+        shm = SharedMemory(name=name)
+        shm.close()
+        shm.unlink()
+
+
+def _create(text: str, password: Optional[str], document_id: Optional[str]) -> tuple[str, str, tuple[int, int]]:
+    return _image_to_shared_memory(_imprint_controller.create(text, password, document_id=document_id))
+
+
+def _create_from_stream(path: str, password: Optional[str]) -> tuple[str, str, tuple[int, int]]:
+    with open(path, "rb") as fp:
+        return _image_to_shared_memory(_imprint_controller.create_from_stream(iter_file(fp), password))
+
+
+def _create_svg(text: str, size: Optional[int]) -> str:
+    return _imprint_controller.create_svg(text, size=size)
+
+
+def _create_preview(text: str, size: int) -> tuple[str, str, tuple[int, int]]:
+    return _image_to_shared_memory(_imprint_controller.create_preview(text, size))
+
+
+def _create_many(
+    texts: list[str], passwords: list[Optional[str]]
+) -> list[tuple[str, str, tuple[int, int]]]:
+    images = _imprint_controller.create_many(texts, passwords, max_workers=1)
+    return [_image_to_shared_memory(image) for image in images]
+
+
+def _unlink_shared_memory(results: list[tuple[str, str, tuple[int, int]]]) -> None:
+    for name, _, _ in results:
+        shm = SharedMemory(name=name)
+        shm.close()
+        shm.unlink()
+
+
+def _discard_shared_memory_list(future) -> None:
+    if not future.cancelled() and future.exception() is None:
+        _unlink_shared_memory(future.result()[0])
+
+
+def _parse(path: str, password: Optional[str]) -> str:
+    with open(path, "rb") as fp:
+        return _imprint_controller.parse_file(fp, password)
+
+
+def _spool_to_disk(fp: BinaryIO) -> str:
+    """Копирует файл кусками во временный файл на диске и возвращает путь; в памяти целиком не держится."""
+    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp:
+        try:
+            shutil.copyfileobj(fp, tmp, _COPY_BUFFER_SIZE)
+        except BaseException:
+            os.unlink(tmp.name)
+            raise
+    return tmp.name
+
+
+class ProcessExecutor(ExecutorBase):
+    """
+    Выполняет задачи в пуле процессов: отрисовка и LSB не упираются в GIL.
+    Воркеры запускаются заранее, картинки возвращаются через разделяемую память, а не pickle.
+    Кэши у каждого воркера свои, поэтому их бюджеты из settings делятся между воркерами.
+    """
+
+    def __init__(
+        self,
+        settings: dict,
+        workers: Optional[int] = None,
+        queue_depth: Optional[int] = None,
+    ):
+        super().__init__(workers=workers, queue_depth=queue_depth)
+        self.settings = _worker_settings(settings, self.workers)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    async def start(self) -> None:
+        if self._pool is not None:
+            return
+
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.settings,),
+        )
+        # Каждая отправка без свободного воркера поднимает новый процесс
+        await asyncio.gather(*(self._submit(_warm_up) for _ in range(self.workers)))
+
+    async def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    async def _submit(self, func, *args, on_abandon=None):
+        future = self._pool.submit(_call, metrics.collecting(), func, *args)
+        try:
+            result, stages = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Запрос отменен, но воркер доделает задачу: освобождаем ее результат, когда он появится
+            if on_abandon is not None:
+                future.add_done_callback(on_abandon)
+            raise
+
+        metrics.extend(stages)
+        return result
+
+    async def _run(self, func, *args, on_abandon=None):
+        await self.start()
+
+        self._acquire()
+        try:
+            return await self._submit(func, *args, on_abandon=on_abandon)
+        finally:
+            self._release()
+
+    async def create(
+        self,
+        text: str,
+        password: Optional[str] = None,
+        document_id: Optional[str] = None,
+    ) -> Image.Image:
+        # Состояние документа хранится в воркере: если правка попала в другой воркер, текст анализируется целиком
+        result = await self._run(_create, text, password, document_id, on_abandon=_discard_shared_memory)
+        return _image_from_shared_memory(*result)
+
+    async def create_from_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        password: Optional[str] = None,
+    ) -> Image.Image:
+        await self.start()
+
+        # Слот занимается до чтения: при заполненной очереди тело не принимается вовсе.
+        # Итератор не передать в другой процесс, поэтому тело уходит на диск, а воркер читает его кусками
+        self._acquire()
+        try:
+            fp = tempfile.NamedTemporaryFile(delete=False)
+            try:
+                with fp:
+                    await spool(chunks, fp)
+                result = await self._submit(_create_from_stream, fp.name, password, on_abandon=_discard_shared_memory)
+            finally:
+                os.unlink(fp.name)
+        finally:
+            self._release()
+
+        return _image_from_shared_memory(*result)
+
+    async def create_svg(self, text: str, size: Optional[int] = None) -> str:
+        return await self._run(_create_svg, text, size)
+
+    async def create_preview(self, text: str, size: int) -> Image.Image:
+        result = await self._run(_create_preview, text, size, on_abandon=_discard_shared_memory)
+        return _image_from_shared_memory(*result)
+
+    async def create_many(
+        self,
+        texts: list[str],
+        passwords: Optional[list[Optional[str]]] = None,
+    ) -> list[Image.Image]:
+        if not texts:
+            return []
+        passwords = passwords or [None] * len(texts)
+
+        # Одинаковые тексты попадают в один воркер, где графика для них рисуется один раз
+        groups: dict[str, list[int]] = {}
+        for index, text in enumerate(texts):
+            groups.setdefault(text, []).append(index)
+
+        chunks = [[] for _ in range(min(self.workers, len(groups)))]
+        for number, indexes in enumerate(groups.values()):
+            chunks[number % len(chunks)].extend(indexes)
+
+        await self.start()
+
+        # Каждая пачка занимает своего воркера, поэтому и свой слот очереди
+        self._acquire(len(chunks))
+        try:
+            results = await asyncio.gather(
+                *(
+                    self._submit(
+                        _create_many,
+                        [texts[index] for index in chunk],
+                        [passwords[index] for index in chunk],
+                        on_abandon=_discard_shared_memory_list,
+                    )
+                    for chunk in chunks
+                ),
+                return_exceptions=True,
+            )
+        finally:
+            self._release(len(chunks))
+
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            for result in results:
+                if not isinstance(result, BaseException):
+                    _unlink_shared_memory(result)
+            raise errors[0]
+
+        images: list[Optional[Image.Image]] = [None] * len(texts)
+        for chunk, chunk_results in zip(chunks, results, strict=True):
+            for index, result in zip(chunk, chunk_results, strict=True):
+                images[index] = _image_from_shared_memory(*result)
+
+        return images
+
+    async def parse(self, fp: BinaryIO, password: Optional[str] = None) -> str:
+        # Воркеру передается путь, а не содержимое: PNG не копируется через pickle,
+        # а воркер открывает его лениво и читает только строки до конца нагрузки
+        await self.start()
+
+        self._acquire()
+        try:
+            path = await anyio.to_thread.run_sync(_spool_to_disk, fp)
+            try:
+                return await self._submit(_parse, path, password)
+            finally:
+                os.unlink(path)
+        finally:
+            self._release()
@@ -1,5 +1,9 @@
+import threading
+
 from PIL import Image, ImageDraw
 
+from imprint.core.controllers.graphic_engine import svg
+from imprint.core.controllers.graphic_engine.display_list import DisplayList
 from imprint.core.controllers.graphic_engine.drawers.base import (
     DrawerBase,
     DrawSettings,
@@ -7,32 +11,85 @@ from imprint.core.controllers.graphic_engine.drawers.base import (
 from imprint.core.controllers.graphic_engine.drawers.core import CoreDrawer
 from imprint.core.controllers.graphic_engine.drawers.crystal import CrystalDrawer
 from imprint.core.controllers.graphic_engine.drawers.flow import FlowDrawer
+from imprint.core.metrics import stage
+
+# Слои меньше этого числа пикселей не переиспользуются между отрисовками
+SMALL_OVERLAY_PIXELS = 1000 * 1000
 
 
 class GraphicEngineController:
 
-    def __init__(self, default_drawers: list[DrawerBase] = None):
+    def __init__(self, default_drawers: list[DrawerBase] = None, reuse_buffers: bool = True):
+        """
+        reuse_buffers — хранить прозрачный слой в каждом потоке и переиспользовать его
+        в следующих отрисовках того же размера вместо выделения нового.
+        """
         if not default_drawers:
             default_drawers = [CrystalDrawer(), CoreDrawer(), FlowDrawer()]
 
         self.default_drawers = default_drawers
+        self.reuse_buffers = reuse_buffers
+        self._local = threading.local()
 
-    def draw(
+    def _get_overlay(self, size: tuple[int, int]) -> Image.Image:
+        # Маленький слой (превью) дешевле выделить заново, чем вытеснить им большой буфер потока
+        if not self.reuse_buffers or size[0] * size[1] < SMALL_OVERLAY_PIXELS:
+            return Image.new("RGBA", size, (0, 0, 0, 0))
+
+        overlay = getattr(self._local, "overlay", None)
+        if overlay is None or overlay.size != size:
+            # Старый буфер освобождается до выделения нового
+            self._local.overlay = None
+            overlay = self._local.overlay = Image.new("RGBA", size, (0, 0, 0, 0))
+        else:
+            overlay.paste((0, 0, 0, 0), (0, 0, *size))
+
+        return overlay
+
+    def build(
         self,
         draw_settings: DrawSettings,
         drawers: list[DrawerBase] = None,
-    ) -> Image:
-        main_img = Image.new(
-            "RGBA",
-            (draw_settings.canvas_size, draw_settings.canvas_size),
-            (255, 255, 255, 255),
-        )
-        overlay = Image.new(
-            "RGBA", (draw_settings.canvas_size, draw_settings.canvas_size), (0, 0, 0, 0)
-        )
-        canvas = ImageDraw.Draw(overlay)
+    ) -> DisplayList:
+        """Геометрия всех слоев без растеризации."""
+        display_list = DisplayList(draw_settings.canvas_size)
 
         for drawer in drawers or self.default_drawers:
-            canvas = drawer.draw(canvas, draw_settings)
+            with stage("drawer", drawer=drawer.name, canvas=draw_settings.canvas_size):
+                display_list = drawer.build(display_list, draw_settings)
+
+        return display_list
+
+    def rasterize(self, display_list: DisplayList, canvas_size: int = None) -> Image:
+        """Растеризует display list на холсте `canvas_size` (по умолчанию — исходного размера)."""
+        canvas_size = canvas_size or display_list.canvas_size
+        size = (canvas_size, canvas_size)
 
-        return Image.alpha_composite(main_img, overlay)
+        with stage("rasterize", canvas=canvas_size):
+            overlay = self._get_overlay(size)
+            display_list.rasterize(ImageDraw.Draw(overlay), canvas_size)
+
+        # Слои смешиваются сразу в итоговый RGB-холст на белом фоне (как alpha_composite с белым RGBA),
+        # без промежуточных RGBA-копий
+        with stage("composite", canvas=canvas_size):
+            main_img = Image.new("RGB", size, (255, 255, 255))
+            main_img.paste(overlay, (0, 0), overlay)
+
+        return main_img
+
+    def to_svg(self, display_list: DisplayList, canvas_size: int = None) -> str:
+        """Векторный вариант: SVG из той же геометрии, без растеризации."""
+        with stage("svg", canvas=canvas_size or display_list.canvas_size):
+            return svg.to_svg(display_list, canvas_size)
+
+    def draw(
+        self,
+        draw_settings: DrawSettings,
+        drawers: list[DrawerBase] = None,
+        canvas_size: int = None,
+    ) -> Image:
+        """
+        canvas_size — растеризовать сразу в другой размер (например, превью 256px):
+        геометрия та же, что у полноразмерной картинки, масштабируются только координаты и толщины.
+        """
+        return self.rasterize(self.build(draw_settings, drawers=drawers), canvas_size)
@@ -0,0 +1,141 @@
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO, Optional
+
+from PIL import Image
+
+from imprint.core.cache import LRUCache
+from imprint.core.controllers.graphic_engine.display_list import DisplayList
+from imprint.core.controllers.graphic_engine.drawers.base import (
+    DrawerBase,
+    DrawSettings,
+)
+
+
+def image_sizeof(image: Image.Image) -> int:
+    return image.width * image.height * len(image.getbands())
+
+
+class _DiskTierCache(LRUCache):
+    """LRU в памяти с бюджетом в байтах и (опционально) вторым уровнем — файлами на диске."""
+
+    suffix: str = None
+
+    def __init__(self, max_bytes: int, sizeof, cache_dir: Optional[str] = None):
+        super().__init__(max_bytes=max_bytes or 0, sizeof=sizeof)
+        self.cache_dir = cache_dir
+        self.disk_hits = 0
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(draw_settings: DrawSettings, drawers: list[DrawerBase]) -> str:
+        chars_digest = hashlib.sha256(repr(draw_settings.chars).encode("utf-8"))
+        chars_digest.update(draw_settings.counts.tobytes())
+        drawers_params = [(drawer.name, sorted(drawer.get_params().items())) for drawer in drawers]
+
+        key = repr(
+            (
+                draw_settings.hash,
+                draw_settings.canvas_size,
+                draw_settings.symbols_count,
+                chars_digest.hexdigest(),
+                drawers_params,
+            )
+        )
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def _load(self, path: str):
+        raise NotImplementedError
+
+    def _save(self, value, fp: BinaryIO) -> None:
+        raise NotImplementedError
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}{self.suffix}")
+
+    def get(self, key: str):
+        value = super().get(key)
+        if value is not None or not self.cache_dir:
+            return value
+
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+
+        value = self._load(path)
+
+        with self._lock:
+            # Промах по памяти уже посчитан в misses, отдельно считаем найденные на диске
+            self.disk_hits += 1
+
+        super().put(key, value)
+        return value
+
+    def put(self, key: str, value) -> None:
+        super().put(key, value)
+
+        if not self.cache_dir or os.path.exists(self._path(key)):
+            return
+
+        # Пишем во временный файл и атомарно переименовываем, чтобы не оставить битый файл
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                self._save(value, fp)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def stats(self) -> dict[str, int]:
+        return {**super().stats(), "disk_hits": self.disk_hits}
+
+
+class RenderCache(_DiskTierCache):
+    """
+    Кэш отрисованной графики (до встраивания стего-слоя).
+    Первый уровень — LRU в памяти с бюджетом в байтах, второй (опционально) — PNG-файлы на диске.
+    """
+
+    suffix = ".png"
+
+    def __init__(
+        self,
+        max_bytes: int = 512 * 1024 * 1024,
+        cache_dir: Optional[str] = None,
+    ):
+        super().__init__(max_bytes=max_bytes, sizeof=image_sizeof, cache_dir=cache_dir)
+
+    def _load(self, path: str) -> Image.Image:
+        image = Image.open(path)
+        image.load()
+        return image
+
+    def _save(self, image: Image.Image, fp: BinaryIO) -> None:
+        image.save(fp, format="PNG", compress_level=1)
+
+
+class GeometryCache(_DiskTierCache):
+    """
+    Кэш геометрии слоев (DisplayList). Не зависит от разрешения растеризации и намного меньше картинки,
+    поэтому переживает вытеснение из RenderCache. Второй уровень (опционально) — .npz-файлы на диске.
+    """
+
+    suffix = ".npz"
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        cache_dir: Optional[str] = None,
+    ):
+        super().__init__(max_bytes=max_bytes, sizeof=lambda display_list: display_list.nbytes, cache_dir=cache_dir)
+
+    def _load(self, path: str) -> DisplayList:
+        with open(path, "rb") as fp:
+            return DisplayList.load(fp)
+
+    def _save(self, display_list: DisplayList, fp: BinaryIO) -> None:
+        display_list.save(fp)
@@ -0,0 +1,143 @@
+from typing import BinaryIO, Optional, Sequence
+
+import numpy as np
+from PIL import ImageDraw
+
+# Типы примитивов
+POLYLINE = 0
+ELLIPSE = 1
+
+# Соединения ломаных
+JOINTS = (None, "curve")
+
+
+class DisplayList:
+    """
+    Промежуточное представление отрисовки: примитивы в порядке рисования,
+    сложенные в типизированные массивы.
+
+    kinds (K,) — тип примитива, offsets (K + 1,) — границы его точек в points (M, 2),
+    colors (K, 4) — RGBA, widths (K,) — толщина линии в пикселях холста 1000px,
+    joints (K,) — индекс в JOINTS. Эллипс хранится двумя точками: углами описанного прямоугольника.
+
+    Координаты заданы для холста `canvas_size`; при растеризации в другой размер они масштабируются,
+    а случайные блуждания не пересчитываются.
+    """
+
+    def __init__(self, canvas_size: int):
+        self.canvas_size = canvas_size
+        self._parts: list[tuple] = []
+        self._arrays: Optional[tuple] = None
+
+    def _add(self, kind: int, lengths, points, fill, width: float, joint: Optional[str]) -> None:
+        count = len(lengths)
+        colors = np.broadcast_to(np.asarray(fill, dtype=np.uint8).reshape(-1, 4), (count, 4))
+
+        self._parts.append(
+            (
+                np.full(count, kind, dtype=np.uint8),
+                np.asarray(lengths, dtype=np.int64),
+                np.asarray(points, dtype=np.float64).reshape(-1, 2),
+                colors,
+                np.full(count, width, dtype=np.float64),
+                np.full(count, JOINTS.index(joint), dtype=np.uint8),
+            )
+        )
+        self._arrays = None
+
+    def packed_polylines(self, points: np.ndarray, lengths, fill, width: float, joint: Optional[str] = None) -> None:
+        """Ломаные разной длины, записанные подряд: points — (M, 2), lengths — число точек каждой."""
+        self._add(POLYLINE, lengths, points, fill, width, joint)
+
+    def polylines(self, paths: np.ndarray, fill, width: float, joint: Optional[str] = None) -> None:
+        """
+        Несколько ломаных одинаковой длины: paths — (K, N, 2).
+        fill — один цвет RGBA на все ломаные или массив (K, 4).
+        """
+        paths = np.asarray(paths, dtype=np.float64)
+        self._add(POLYLINE, np.full(paths.shape[0], paths.shape[1]), paths, fill, width, joint)
+
+    def polyline(self, points: Sequence, fill, width: float, joint: Optional[str] = None) -> None:
+        self.polylines(np.asarray(points, dtype=np.float64)[None], fill, width, joint)
+
+    def ellipse(self, box: Sequence[float], fill) -> None:
+        self._add(ELLIPSE, [2], box, fill, 0, None)
+
+    @property
+    def arrays(self) -> tuple[np.ndarray, ...]:
+        """(kinds, offsets, points, colors, widths, joints)."""
+        if self._arrays is None:
+            parts = self._parts or [
+                (
+                    np.empty(0, dtype=np.uint8),
+                    np.empty(0, dtype=np.int64),
+                    np.empty((0, 2)),
+                    np.empty((0, 4), dtype=np.uint8),
+                    np.empty(0),
+                    np.empty(0, dtype=np.uint8),
+                )
+            ]
+            kinds, lengths, points, colors, widths, joints = (
+                np.concatenate(column) for column in zip(*parts, strict=True)
+            )
+
+            self._parts = [(kinds, lengths, points, colors, widths, joints)]
+            self._arrays = (kinds, np.concatenate([[0], np.cumsum(lengths)]), points, colors, widths, joints)
+
+        return self._arrays
+
+    def __len__(self) -> int:
+        return len(self.arrays[0])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.arrays)
+
+    def rasterize(self, canvas: ImageDraw, canvas_size: Optional[int] = None) -> ImageDraw:
+        """Рисует примитивы на холсте размера `canvas_size` (по умолчанию — исходного)."""
+        canvas_size = canvas_size or self.canvas_size
+        kinds, offsets, points, colors, widths, joints = self.arrays
+
+        if canvas_size != self.canvas_size:
+            points = points * (canvas_size / self.canvas_size)
+
+        # Один перевод в списки Python на весь слой вместо преобразования каждого примитива
+        flat = points.ravel().tolist()
+        offsets = (offsets * 2).tolist()
+        fills = list(map(tuple, colors.tolist()))
+        joints = [JOINTS[joint] for joint in joints.tolist()]
+        line_widths = [max(1, int(width * (canvas_size / 1000))) for width in widths.tolist()]
+
+        for i, kind in enumerate(kinds.tolist()):
+            xy = flat[offsets[i] : offsets[i + 1]]
+            if kind == POLYLINE:
+                canvas.line(xy, fill=fills[i], width=line_widths[i], joint=joints[i])
+            else:
+                canvas.ellipse(xy, fill=fills[i])
+
+        return canvas
+
+    def save(self, fp: BinaryIO) -> None:
+        np.savez_compressed(
+            fp,
+            canvas_size=self.canvas_size,
+            **dict(zip(("kinds", "offsets", "points", "colors", "widths", "joints"), self.arrays, strict=True)),
+        )
+
+    @classmethod
+    def load(cls, fp: BinaryIO) -> "DisplayList":
+        with np.load(fp) as data:
+            display_list = cls(int(data["canvas_size"]))
+            offsets = data["offsets"]
+            display_list._parts = [
+                (
+                    data["kinds"],
+                    np.diff(offsets),
+                    data["points"],
+                    data["colors"],
+                    data["widths"],
+                    data["joints"],
+                )
+            ]
+
+        return display_list
@@ -1,23 +1,72 @@
 import colorsys
-from typing import Optional
+import math
+from typing import Iterable, Optional
 
+import numpy as np
 from PIL import ImageColor, ImageDraw
-from pydantic import BaseModel
 
+from imprint.core.controllers.graphic_engine.display_list import DisplayList
 
-class DrawSettings(BaseModel):
-    hash: str
-    canvas_size: int
-    symbols_count: int
-    chars_stats: list[tuple]
 
-    @property
-    def scale_factor(self):
-        return self.canvas_size / 1000
+class DrawSettings:
+    """
+    Контекст отрисовки. Строится один раз на запрос и общий для всех слоев,
+    поэтому байты хэша, seed, базовый тон и статистика символов считаются заранее.
+    Неизменяемый: слои только читают его.
+    """
+
+    __slots__ = (
+        "hash",
+        "canvas_size",
+        "symbols_count",
+        "chars",
+        "counts",
+        "scale_factor",
+        "bytes_list",
+        "seed",
+        "base_hue",
+    )
+
+    def __init__(
+        self,
+        hash: str,
+        canvas_size: int,
+        symbols_count: int,
+        chars_stats: Iterable[tuple[str, int]],
+    ):
+        stats = list(chars_stats)
+        counts = np.array([count for _, count in stats], dtype=np.int64)
+        counts.flags.writeable = False
+        bytes_list = tuple(int(hash[i : i + 2], 16) for i in range(0, len(hash), 2))
+
+        init = super().__setattr__
+        init("hash", hash)
+        init("canvas_size", canvas_size)
+        init("symbols_count", symbols_count)
+        init("chars", tuple(char for char, _ in stats))
+        init("counts", counts)
+        init("scale_factor", canvas_size / 1000)
+        init("bytes_list", bytes_list)
+        init("seed", int(hash, 16) % (2**32))
+        # Тон по сумме каждого 4-го байта хэша
+        init("base_hue", sum(bytes_list[::4]) % 360)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("DrawSettings is immutable")
 
     @property
-    def bytes_list(self):
-        return [int(self.hash[i : i + 2], 16) for i in range(0, len(self.hash), 2)]
+    def chars_stats(self) -> list[tuple[str, int]]:
+        return list(zip(self.chars, self.counts.tolist(), strict=True))
+
+    def replace(self, **changes) -> "DrawSettings":
+        """Копия контекста с измененными исходными полями."""
+        fields = {
+            "hash": self.hash,
+            "canvas_size": self.canvas_size,
+            "symbols_count": self.symbols_count,
+            "chars_stats": self.chars_stats,
+        }
+        return DrawSettings(**{**fields, **changes})
 
 
 class DrawerBase:
@@ -36,6 +85,17 @@ class DrawerBase:
         self.line_width = line_width
         self.density = density
 
+    def get_params(self) -> dict:
+        """Параметры отрисовки слоя (используются, например, в ключе кэша)."""
+        return {key: value for key, value in vars(self).items() if not key.startswith("_")}
+
+    def get_base_hue(self, draw_settings: DrawSettings) -> float:
+        """Базовый тон слоя: из цвета слоя, если он задан, иначе заранее посчитанный тон хэша."""
+        if self.color is None:
+            return draw_settings.base_hue
+
+        return self.get_base_hue_color(draw_settings.bytes_list)
+
     def get_base_hue_color(self, bytes_list: list[int]):
         hash_sum = sum(bytes_list[i] for i in range(0, len(bytes_list), 4))
         base_hue = hash_sum % 360
@@ -70,10 +130,34 @@ class DrawerBase:
         rgb = colorsys.hsv_to_rgb(h / 360.0, s / 100.0, v / 100.0)
         return tuple(int(c * 255) for c in rgb)
 
+    @staticmethod
+    def rotate_sectors(points: np.ndarray, num_sectors: int, center: tuple[float, float]) -> np.ndarray:
+        """
+        Поворачивает путь (N, 2) во все `num_sectors` секторов одной операцией и смещает к центру.
+        Возвращает массив (num_sectors, N, 2).
+        """
+        angle_step = 2 * math.pi / num_sectors
+        angles = [i * angle_step for i in range(num_sectors)]
+        # Синусы/косинусы через math, чтобы совпадать до бита с поточечным поворотом
+        cos = np.array([math.cos(a) for a in angles])[:, None]
+        sin = np.array([math.sin(a) for a in angles])[:, None]
+
+        px = points[None, :, 0]
+        py = points[None, :, 1]
+        rx = px * cos - py * sin
+        ry = px * sin + py * cos
+
+        return np.stack([rx + center[0], ry + center[1]], axis=-1)
+
+    def build(self, display_list: DisplayList, draw_settings: DrawSettings) -> DisplayList:
+        """Добавляет примитивы слоя в display list."""
+        raise NotImplementedError
+
     def draw(
         self,
         canvas: ImageDraw,
         draw_settings: DrawSettings,
         **kwargs,
     ) -> ImageDraw:
-        raise NotImplementedError
+        display_list = self.build(DisplayList(draw_settings.canvas_size), draw_settings)
+        return display_list.rasterize(canvas)
@@ -1,8 +1,7 @@
 import math
 from typing import Optional
 
-from PIL import ImageDraw
-
+from imprint.core.controllers.graphic_engine.display_list import DisplayList
 from imprint.core.controllers.graphic_engine.drawers.base import (
     DrawerBase,
     DrawSettings,
@@ -15,14 +14,9 @@ class CoreDrawer(DrawerBase):
     def __init__(self, color: Optional[str] = None, alpha: int = 200):
         super().__init__(color=color, alpha=alpha)
 
-    def draw(
-        self,
-        canvas: ImageDraw,
-        draw_settings: DrawSettings,
-        **kwargs,
-    ) -> ImageDraw:
+    def build(self, display_list: DisplayList, draw_settings: DrawSettings) -> DisplayList:
         center_x = center_y = draw_settings.canvas_size // 2
-        base_hue = self.get_base_hue_color(draw_settings.bytes_list)
+        base_hue = self.get_base_hue(draw_settings)
         core_rgb = self.get_rgb_base_color(base_hue, 90, 60)
 
         rgba_core = (*core_rgb[:3], self.alpha)
@@ -32,15 +26,14 @@ class CoreDrawer(DrawerBase):
             * (1 + math.log10(max(1, draw_settings.symbols_count)))
         )
 
-        # Рисуем круг в Pillow
-        canvas.ellipse(
+        display_list.ellipse(
             [
                 center_x - core_radius,
                 center_y - core_radius,
                 center_x + core_radius,
                 center_y + core_radius,
             ],
-            fill=rgba_core,
+            rgba_core,
         )
 
-        return canvas
+        return display_list
@@ -2,13 +2,17 @@ import math
 import random
 from typing import Optional
 
-from PIL import ImageDraw
+import numpy as np
 
+from imprint.core.controllers.graphic_engine.display_list import DisplayList
 from imprint.core.controllers.graphic_engine.drawers.base import (
     DrawerBase,
     DrawSettings,
 )
 
+# Лимит лучей на один символ
+MAX_CHAR_RAYS = 800
+
 
 class CrystalDrawer(DrawerBase):
     name = "crystal"
@@ -18,56 +22,96 @@ class CrystalDrawer(DrawerBase):
         color: Optional[str] = None,
         alpha: int = 180,
         line_width: Optional[float] = 0.5,
+        max_rays: int = 20000,
     ):
+        """
+        max_rays — общий бюджет лучей на весь слой. Если символов так много, что лучей больше бюджета,
+        он делится между секторами пропорционально их доле в тексте.
+        """
         super().__init__(
             color=color,
             alpha=alpha,
             line_width=line_width,
         )
+        self.max_rays = max_rays
+
+    @staticmethod
+    def _random(seed: int) -> np.random.RandomState:
+        """Numpy-генератор с тем же потоком чисел, что и random.Random(seed)."""
+        state = random.Random(seed).getstate()[1]
+        rng = np.random.RandomState()
+        rng.set_state(("MT19937", np.array(state[:-1], dtype=np.uint32), state[-1]))
+        return rng
+
+    def _rays_per_char(self, percentages: np.ndarray, num_rays: int) -> tuple[np.ndarray, bool]:
+        """Число лучей каждого символа и признак того, что бюджет урезал их."""
+        rays = np.full(len(percentages), min(num_rays, MAX_CHAR_RAYS))
+        if rays.sum() <= self.max_rays:
+            return rays, False
+
+        # Округление нарастающим итогом: редкие символы получают лучи по очереди, сумма не выходит за бюджет
+        budget = np.floor(np.cumsum(percentages) * self.max_rays).astype(int)
+        return np.minimum(rays, np.diff(budget, prepend=0)), True
+
+    def build(self, display_list: DisplayList, draw_settings: DrawSettings) -> DisplayList:
+        if not draw_settings.chars:
+            return display_list
 
-    def draw(
-        self,
-        canvas: ImageDraw,
-        draw_settings: DrawSettings,
-        **kwargs,
-    ) -> ImageDraw:
         center_x = center_y = draw_settings.canvas_size // 2
-        base_hue = self.get_base_hue_color(draw_settings.bytes_list)
-        core_rgb = self.get_rgb_base_color(base_hue, 90, 60)
+        base_hue = self.get_base_hue(draw_settings)
 
-        line_width = max(1, int(self.line_width * draw_settings.scale_factor))
         max_radius = (draw_settings.canvas_size // 2) * 0.85
-        current_angle = 0.0
-        seed = int(draw_settings.hash, 16) % (2**32)
-        rng = random.Random(seed)
+        seed = draw_settings.seed
 
-        for i, (char, count) in enumerate(draw_settings.chars_stats):
-            percentage = count / draw_settings.symbols_count
-            angle_sweep = percentage * 360
-            s_val, v_val = max(0, min(100, 40 + (i % 20))), 90
-
-            rgb_base = self.get_rgb_base_color(base_hue, s_val, v_val)
-            rgba_crystal = (*rgb_base, self.alpha)
-
-            num_rays = int(
-                60 * (1 + 0.3 * math.log10(max(1, draw_settings.symbols_count)))
-            )
-            radius = min(max_radius * (percentage * 10), max_radius)
-
-            for _ in range(min(num_rays, 800)):
-                rad_angle = math.radians(
-                    rng.uniform(current_angle, current_angle + angle_sweep)
-                )
-                length = radius * rng.uniform(0.7, 1.1)
-                x_end = center_x + math.cos(rad_angle) * length
-                y_end = center_y + math.sin(rad_angle) * length
-
-                canvas.line(
-                    [(center_x, center_y), (x_end, y_end)],
-                    fill=rgba_crystal,
-                    width=line_width,
-                )
+        num_rays = int(60 * (1 + 0.3 * math.log10(max(1, draw_settings.symbols_count))))
 
+        percentages = draw_settings.counts / draw_settings.symbols_count
+        rays, over_budget = self._rays_per_char(percentages, num_rays)
+
+        # Границы секторов накапливаются последовательно, как при обходе символов по одному
+        starts, sweeps = [], []
+        current_angle = 0.0
+        for percentage in percentages.tolist():
+            angle_sweep = percentage * 360
+            starts.append(current_angle)
+            sweeps.append((current_angle + angle_sweep) - current_angle)
             current_angle += angle_sweep
 
-        return canvas
+        radius = np.minimum(max_radius * (percentages * 10), max_radius)
+
+        # Углы и длины всех лучей одним вызовом: пары (угол, длина) идут в том же порядке, что rng.uniform
+        samples = self._random(seed).random_sample((int(rays.sum()), 2))
+        angles = np.repeat(starts, rays) + np.repeat(sweeps, rays) * samples[:, 0]
+        lengths = np.repeat(radius, rays) * (0.7 + (1.1 - 0.7) * samples[:, 1])
+
+        rad_angles = angles * (math.pi / 180)
+        x_ends = center_x + np.cos(rad_angles) * lengths
+        y_ends = center_y + np.sin(rad_angles) * lengths
+
+        chars = np.repeat(np.arange(len(rays)), rays)
+        if over_budget:
+            # Лучи одного символа, которые заканчиваются в одном пикселе, рисуются один раз.
+            # Повторный луч поверх полупрозрачного меняет цвет пикселей, поэтому в пределах бюджета
+            # рисуются все лучи и картинка совпадает с исходной
+            keys = np.stack([chars, np.rint(x_ends), np.rint(y_ends)], axis=-1)
+            _, first = np.unique(keys, axis=0, return_index=True)
+            first.sort()
+        else:
+            first = np.arange(len(chars))
+
+        # Насыщенность зависит только от i % 20, поэтому цветов не больше двадцати
+        colors = np.array(
+            [
+                (*self.get_rgb_base_color(base_hue, max(0, min(100, 40 + i)), 90), self.alpha)
+                for i in range(20)
+            ]
+        )
+
+        segments = np.empty((len(first), 2, 2))
+        segments[:, 0] = center_x, center_y
+        segments[:, 1, 0] = x_ends[first]
+        segments[:, 1, 1] = y_ends[first]
+
+        display_list.polylines(segments, colors[chars[first] % 20], self.line_width)
+
+        return display_list
@@ -2,13 +2,17 @@ import math
 import random
 from typing import Optional
 
-from PIL import ImageDraw
+import numpy as np
 
+from imprint.core.controllers.graphic_engine.display_list import DisplayList
 from imprint.core.controllers.graphic_engine.drawers.base import (
     DrawerBase,
     DrawSettings,
 )
 
+# Шаги квадратичной интерполяции между соседними точками пути
+SMOOTH_STEPS = 4
+
 
 class FlowDrawer(DrawerBase):
     name = "flow"
@@ -18,18 +22,68 @@ class FlowDrawer(DrawerBase):
         color: Optional[str] = None,
         alpha: int = 255,
         line_width: Optional[float] = 2.0,
+        compat: bool = True,
     ):
+        """
+        compat — генерировать путь через random.Random(seed), как раньше, чтобы существующие
+        отпечатки не менялись. Без него шаги генерируются numpy-генератором целиком.
+        """
         super().__init__(
             color=color,
             alpha=alpha,
             line_width=line_width,
         )
+        self.compat = compat
+
+    def _walk(self, seed: int, density: int, start: float, step_dist: float, limit: float) -> np.ndarray:
+        """Случайное блуждание: шаг отбрасывается, если выводит точку за радиус `limit`."""
+        if self.compat:
+            rng = random.Random(seed)
+            angles = [rng.uniform(0, 2 * math.pi) for _ in range(density)]
+            steps = [(math.cos(angle) * step_dist, math.sin(angle) * step_dist) for angle in angles]
+        else:
+            angles = np.random.default_rng(seed).uniform(0, 2 * math.pi, density)
+            steps = np.stack([np.cos(angles), np.sin(angles)], axis=-1) * step_dist
+            steps = steps.tolist()
+
+        path_points = [(start, start)]
+        curr_x, curr_y = start, start
+
+        for dx, dy in steps:
+            new_x = curr_x + dx
+            new_y = curr_y + dy
+
+            # Ограничение радиуса
+            if math.hypot(new_x, new_y) < limit:
+                curr_x, curr_y = new_x, new_y
+                path_points.append((curr_x, curr_y))
+
+        return np.array(path_points)
+
+    @staticmethod
+    def _smooth(rotated: np.ndarray) -> np.ndarray:
+        """
+        Сглаживание через средние точки (Quadratic Spline) сразу для всех секторов.
+        rotated — (S, N, 2), результат — (S, 1 + SMOOTH_STEPS * (N - 2), 2).
+        """
+        p0 = rotated[:, 1:-1]
+        mid = (p0 + rotated[:, 2:]) / 2
+
+        # Каждый отрезок начинается в конце предыдущего: при t=1 кривая приходит ровно в среднюю точку
+        last_p = np.concatenate([rotated[:, :1], mid[:, :-1]], axis=1)
+
+        steps = []
+        for t_step in range(1, SMOOTH_STEPS + 1):
+            t = t_step / SMOOTH_STEPS
+            last_p = (1 - t) ** 2 * last_p + 2 * (1 - t) * t * p0 + t**2 * mid
+            steps.append(last_p)
 
-    def draw(
-        self, canvas: ImageDraw, draw_settings: DrawSettings, **kwargs
-    ) -> ImageDraw:
+        curves = np.stack(steps, axis=2).reshape(rotated.shape[0], -1, 2)
+
+        return np.concatenate([rotated[:, :1], curves], axis=1)
+
+    def build(self, display_list: DisplayList, draw_settings: DrawSettings) -> DisplayList:
         center_x = center_y = draw_settings.canvas_size // 2
-        line_width = max(1, int(self.line_width * draw_settings.scale_factor))
 
         sc = draw_settings.symbols_count if draw_settings.symbols_count > 0 else 1
 
@@ -38,13 +92,12 @@ class FlowDrawer(DrawerBase):
         final_density = max(300, min(1000, int(dynamic_density)))
 
         # Определение цвета
-        base_hue = self.get_base_hue_color(draw_settings.bytes_list)
+        base_hue = self.get_base_hue(draw_settings)
         pattern_rgb = self.get_rgb_base_color(base_hue, 90, 60)
         rgba_pattern = (*pattern_rgb[:3], self.alpha)
 
         # Параметры генерации
-        seed = int(draw_settings.hash, 16) % (2**32)
-        rng = random.Random(seed)
+        seed = draw_settings.seed
 
         step_dist = 12 * draw_settings.scale_factor
 
@@ -52,69 +105,22 @@ class FlowDrawer(DrawerBase):
         dynamic_sectors = 4 + int(math.log(sc, 4))
         num_sectors = max(4, min(18, dynamic_sectors))
 
-        angle_step = 2 * math.pi / num_sectors
-
         # 1. Генерируем "скелет" пути (набор точек одного сектора)
-        path_points = [
-            (draw_settings.canvas_size * 0.05, draw_settings.canvas_size * 0.05)
-        ]
-        curr_x, curr_y = path_points[0]
+        path_points = self._walk(
+            seed,
+            final_density,
+            start=draw_settings.canvas_size * 0.05,
+            step_dist=step_dist,
+            limit=draw_settings.canvas_size * 0.45,
+        )
 
-        for _ in range(final_density):
-            angle = rng.uniform(0, 2 * math.pi)
-            new_x = curr_x + math.cos(angle) * step_dist
-            new_y = curr_y + math.sin(angle) * step_dist
+        if len(path_points) <= 2:
+            return display_list
 
-            # Ограничение радиуса
-            if math.hypot(new_x, new_y) < (draw_settings.canvas_size * 0.45):
-                curr_x, curr_y = new_x, new_y
-                path_points.append((curr_x, curr_y))
+        # 2. Поворот во все сектора одной матричной операцией и сглаживание на массивах
+        rotated = self.rotate_sectors(path_points, num_sectors, (center_x, center_y))
+
+        # Каждый сектор — одна сглаженная кривая
+        display_list.polylines(self._smooth(rotated), rgba_pattern, self.line_width, joint="curve")
 
-        # 2. Отрисовка сглаженных путей для каждого сектора
-        for i in range(num_sectors):
-            sector_angle = i * angle_step
-
-            # Трансформируем и сглаживаем точки "на лету"
-            rotated_points = []
-            for px, py in path_points:
-                # Поворот
-                rx = px * math.cos(sector_angle) - py * math.sin(sector_angle)
-                ry = px * math.sin(sector_angle) + py * math.cos(sector_angle)
-                # Смещение к центру
-                rotated_points.append((rx + center_x, ry + center_y))
-
-            # Сглаживание: создаем кривую через средние точки (Quadratic Spline)
-            if len(rotated_points) > 2:
-                smoothed_path = [rotated_points[0]]
-                for j in range(1, len(rotated_points) - 1):
-                    p0 = rotated_points[j]
-                    p1 = rotated_points[j + 1]
-
-                    # Генерируем промежуточные точки кривой между p0 и p1
-                    # используя p0 как контрольную точку
-                    for t_step in range(1, 5):
-                        t = t_step / 4
-                        # Берем среднюю точку как целевую для плавности
-                        mid_x = (p0[0] + p1[0]) / 2
-                        mid_y = (p0[1] + p1[1]) / 2
-
-                        # Упрощенная интерполяция для эффекта скругления
-                        last_p = smoothed_path[-1]
-                        qx = (
-                            (1 - t) ** 2 * last_p[0]
-                            + 2 * (1 - t) * t * p0[0]
-                            + t**2 * mid_x
-                        )
-                        qy = (
-                            (1 - t) ** 2 * last_p[1]
-                            + 2 * (1 - t) * t * p0[1]
-                            + t**2 * mid_y
-                        )
-                        smoothed_path.append((qx, qy))
-
-                # Рисуем всю кривую целиком одним методом
-                canvas.line(
-                    smoothed_path, fill=rgba_pattern, width=line_width, joint="curve"
-                )
-
-        return canvas
+        return display_list
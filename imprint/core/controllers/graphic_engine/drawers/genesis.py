@@ -3,13 +3,17 @@ import math
 import random
 from typing import Optional
 
-from PIL import ImageColor, ImageDraw
+import numpy as np
 
+from imprint.core.controllers.graphic_engine.display_list import DisplayList
 from imprint.core.controllers.graphic_engine.drawers.base import (
     DrawerBase,
     DrawSettings,
 )
 
+# Отрезков ломаной между соседними средними точками пути
+SEGMENT_STEPS = 4
+
 
 class GenesisDrawer(DrawerBase):
     name = "genesis"
@@ -19,42 +23,62 @@ class GenesisDrawer(DrawerBase):
         color: Optional[str] = None,
         alpha: int = 255,
         line_width: Optional[float] = 2.0,
+        palette_size: int = 64,
     ):
+        """
+        palette_size — на сколько цветов квантуется радиальный градиент. При 64 цветах картинка отличается
+        от расчета цвета для каждого отрезка на несколько единиц канала (до 3/255 на проверенных текстах).
+        """
         super().__init__(
             color=color,
             alpha=alpha,
             line_width=line_width,
         )
-
-    def draw(
-        self, canvas: ImageDraw, draw_settings: DrawSettings, **kwargs
-    ) -> ImageDraw:
+        self.palette_size = palette_size
+
+    @staticmethod
+    def _segment_points(rotated: np.ndarray) -> np.ndarray:
+        """
+        Вершины ломаной через средние точки соседних отрезков пути, SEGMENT_STEPS отрезков на точку.
+        rotated — (S, N, 2), результат — (S, SEGMENT_STEPS * (N - 2) + 1, 2).
+        """
+        mid = (rotated[:, :-1] + rotated[:, 1:]) / 2
+        m1 = mid[:, :-1, None]
+        m2 = mid[:, 1:, None]
+
+        t = (np.arange(SEGMENT_STEPS) / SEGMENT_STEPS)[:, None]
+        points = ((1 - t) * m1 + t * m2).reshape(rotated.shape[0], -1, 2)
+
+        # Конец последнего отрезка — средняя точка последней пары
+        return np.concatenate([points, mid[:, -1:]], axis=1)
+
+    def _palette(self, base_hue: float) -> list[tuple[int, int, int, int]]:
+        palette = []
+        for level in range(self.palette_size):
+            ratio = level / max(1, self.palette_size - 1)
+            sat = 100 - (ratio * 70)
+            val = 40 + (ratio * 60)
+            alpha = int(self.alpha * (1.0 - ratio * 0.8))
+
+            rgb = [
+                int(x * 255)
+                for x in colorsys.hsv_to_rgb(base_hue / 360, sat / 100, val / 100)
+            ]
+            palette.append((*rgb, alpha))
+
+        return palette
+
+    def build(self, display_list: DisplayList, draw_settings: DrawSettings) -> DisplayList:
         center_x = center_y = draw_settings.canvas_size // 2
-        line_width = max(1, int(self.line_width * draw_settings.scale_factor))
         sc = draw_settings.symbols_count if draw_settings.symbols_count > 0 else 1
 
         # Динамические параметры
         final_density = max(300, min(1000, 300 + 50 * int(math.log(sc, 3))))
         num_sectors = max(4, min(18, 4 + int(math.log(sc, 4))))
-        angle_step = 2 * math.pi / num_sectors
         max_radius = draw_settings.canvas_size * 0.45
 
-        # Логика цвета (Hue)
-        if self.color:
-            rgb = (
-                ImageColor.getrgb(self.color)
-                if isinstance(self.color, str)
-                else self.color
-            )
-            h, s, v = colorsys.rgb_to_hsv(rgb[0] / 255, rgb[1] / 255, rgb[2] / 255)
-            base_hue = h * 360
-        else:
-            # Тот самый "хитрый" хэш каждого 4-го байта
-            hash_sum = sum(
-                draw_settings.bytes_list[i]
-                for i in range(0, len(draw_settings.bytes_list), 4)
-            )
-            base_hue = hash_sum % 360
+        # Логика цвета (Hue): тон цвета слоя или "хитрый" хэш каждого 4-го байта
+        base_hue = self.get_base_hue(draw_settings)
 
         # --- ГЕНЕРАЦИЯ ПУТИ С НАСЛЕДОВАНИЕМ ---
         hex_hash = draw_settings.hash
@@ -86,46 +110,42 @@ class GenesisDrawer(DrawerBase):
                 points_drawn += 1
 
         # --- ОТРИСОВКА ---
-        for i in range(num_sectors):
-            sector_angle = i * angle_step
-            rotated = []
-            for px, py in path_points:
-                rx = px * math.cos(sector_angle) - py * math.sin(sector_angle)
-                ry = px * math.sin(sector_angle) + py * math.cos(sector_angle)
-                rotated.append((rx + center_x, ry + center_y))
-
-            if len(rotated) < 3:
-                continue
-
-            for j in range(1, len(rotated) - 1):
-                p0, p1, p2 = rotated[j - 1], rotated[j], rotated[j + 1]
-                steps = 4
-                for t_idx in range(steps):
-                    t, t_n = t_idx / steps, (t_idx + 1) / steps
-
-                    def get_bezier(time):
-                        m1x, m1y = (p0[0] + p1[0]) / 2, (p0[1] + p1[1]) / 2
-                        m2x, m2y = (p1[0] + p2[0]) / 2, (p1[1] + p2[1]) / 2
-                        return (1 - time) * m1x + time * m2x, (
-                            1 - time
-                        ) * m1y + time * m2y
-
-                    ps, pe = get_bezier(t), get_bezier(t_n)
-
-                    # Градиент: темный/насыщенный в центре -> светлый/прозрачный по краям
-                    dist = math.hypot(ps[0] - center_x, ps[1] - center_y)
-                    ratio = min(1.0, dist / max_radius)
-
-                    sat = 100 - (ratio * 70)
-                    val = 40 + (ratio * 60)
-                    alpha = int(self.alpha * (1.0 - ratio * 0.8))
-
-                    rgb = [
-                        int(x * 255)
-                        for x in colorsys.hsv_to_rgb(
-                            base_hue / 360, sat / 100, val / 100
-                        )
-                    ]
-                    canvas.line([ps, pe], fill=(*rgb, alpha), width=line_width)
-
-        return canvas
+        if len(path_points) < 3:
+            return display_list
+
+        rotated = self.rotate_sectors(
+            np.array(path_points), num_sectors, (center_x, center_y)
+        )
+        points = self._segment_points(rotated)
+
+        # Градиент: темный/насыщенный в центре -> светлый/прозрачный по краям.
+        # Цвет считается по началу отрезка и квантуется в палитру
+        starts = points[:, :-1]
+        dist = np.hypot(starts[..., 0] - center_x, starts[..., 1] - center_y)
+        ratio = np.minimum(1.0, dist / max_radius)
+        levels = np.rint(ratio * (self.palette_size - 1)).astype(np.intp)
+        palette = np.array(self._palette(base_hue))
+
+        # Подряд идущие отрезки одного цвета — одна ломаная; в начале каждого сектора — новая ломаная
+        segments_count = levels.shape[1]
+        flat_levels = levels.ravel()
+        new_run = np.ones(flat_levels.size, dtype=bool)
+        new_run[1:] = flat_levels[1:] != flat_levels[:-1]
+        new_run[::segments_count] = True
+
+        run_starts = np.flatnonzero(new_run)
+        lengths = np.diff(np.append(run_starts, flat_levels.size)) + 1
+
+        # В секторе на одну точку больше, чем отрезков: точка начала отрезка g — g + g // segments_count
+        first_points = run_starts + run_starts // segments_count
+        run_offsets = np.cumsum(lengths) - lengths
+        indices = np.arange(lengths.sum()) - np.repeat(run_offsets - first_points, lengths)
+
+        display_list.packed_polylines(
+            points.reshape(-1, 2)[indices],
+            lengths,
+            palette[flat_levels[run_starts]],
+            self.line_width,
+        )
+
+        return display_list
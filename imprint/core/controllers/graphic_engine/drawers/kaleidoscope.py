@@ -2,8 +2,9 @@ import math
 import random
 from typing import Optional
 
-from PIL import ImageDraw
+import numpy as np
 
+from imprint.core.controllers.graphic_engine.display_list import DisplayList
 from imprint.core.controllers.graphic_engine.drawers.base import (
     DrawerBase,
     DrawSettings,
@@ -27,48 +28,50 @@ class KaleidoscopeDrawer(DrawerBase):
             density=density,
         )
 
-    def draw(
-        self, canvas: ImageDraw, draw_settings: DrawSettings, **kwargs
-    ) -> ImageDraw:
-        center_x = center_y = draw_settings.canvas_size // 2
-        line_width = max(1, int(self.line_width * draw_settings.scale_factor))
-
-        base_hue = self.get_base_hue_color(draw_settings.bytes_list)
-        pattern_rgb = self.get_rgb_base_color(base_hue, 90, 60)
-        rgba_pattern = (*pattern_rgb[:3], self.alpha)
-
-        seed = int(draw_settings.hash, 16) % (2**32)
+    def _walk(self, seed: int, start: float, step_dist: float, limit: float) -> np.ndarray:
+        """
+        Путь "пьяной точки" в виде вершин одной ломаной.
+        Шаг за радиус `limit` все равно рисуется, после чего точка возвращается назад
+        по тому же отрезку — поэтому в путь добавляется и точка возврата.
+        """
         rng = random.Random(seed)
-        num_sectors = 4 + (draw_settings.bytes_list[0] % 9)
-        angle_step = 2 * math.pi / num_sectors
-        curr_x, curr_y = (
-            draw_settings.canvas_size * 0.02,
-            draw_settings.canvas_size * 0.02,
-        )
-        step_dist = 9 * draw_settings.scale_factor
+        angles = [rng.uniform(0, 2 * math.pi) for _ in range(self.density)]
 
-        for _ in range(self.density):
-            angle = rng.uniform(0, 2 * math.pi)
+        curr_x, curr_y = start, start
+        path_points = [(curr_x, curr_y)]
+
+        for angle in angles:
             prev_x, prev_y = curr_x, curr_y
             curr_x += math.cos(angle) * step_dist
             curr_y += math.sin(angle) * step_dist
+            path_points.append((curr_x, curr_y))
+
+            if math.hypot(curr_x, curr_y) > limit:
+                curr_x, curr_y = prev_x, prev_y
+                path_points.append((curr_x, curr_y))
 
-            for i in range(num_sectors):
-                sector_angle = i * angle_step
+        return np.array(path_points)
 
-                def rotate(px, py, a):
-                    return px * math.cos(a) - py * math.sin(a), px * math.sin(
-                        a
-                    ) + py * math.cos(a)
+    def build(self, display_list: DisplayList, draw_settings: DrawSettings) -> DisplayList:
+        center_x = center_y = draw_settings.canvas_size // 2
 
-                x1, y1 = rotate(prev_x, prev_y, sector_angle)
-                x2, y2 = rotate(curr_x, curr_y, sector_angle)
-                start_p = (x1 + center_x, y1 + center_y)
-                end_p = (x2 + center_x, y2 + center_y)
+        base_hue = self.get_base_hue(draw_settings)
+        pattern_rgb = self.get_rgb_base_color(base_hue, 90, 60)
+        rgba_pattern = (*pattern_rgb[:3], self.alpha)
 
-                canvas.line([start_p, end_p], fill=rgba_pattern, width=line_width)
+        seed = draw_settings.seed
+        num_sectors = 4 + (draw_settings.bytes_list[0] % 9)
 
-            if math.hypot(curr_x, curr_y) > (draw_settings.canvas_size * 0.45):
-                curr_x, curr_y = prev_x, prev_y
+        path_points = self._walk(
+            seed,
+            start=draw_settings.canvas_size * 0.02,
+            step_dist=9 * draw_settings.scale_factor,
+            limit=draw_settings.canvas_size * 0.45,
+        )
+
+        # Повороты всех секторов одной операцией, каждый сектор — одна ломаная
+        rotated = self.rotate_sectors(path_points, num_sectors, (center_x, center_y))
+
+        display_list.polylines(rotated, rgba_pattern, self.line_width)
 
-        return canvas
+        return display_list
@@ -0,0 +1,90 @@
+from typing import Optional
+
+import numpy as np
+
+from imprint.core.controllers.graphic_engine.display_list import JOINTS, POLYLINE, DisplayList
+
+
+def _color(rgba: tuple[int, int, int, int]) -> tuple[str, Optional[str]]:
+    r, g, b, a = rgba
+    return f"#{r:02x}{g:02x}{b:02x}", (None if a == 255 else f"{a / 255:.3g}")
+
+
+def _subpath(points: np.ndarray) -> str:
+    """Ломаная в относительных командах: первая точка абсолютная, дальше — приращения."""
+    deltas = np.diff(points, axis=0)
+    # После квантования соседние точки могут совпасть: нулевые шаги не нужны
+    deltas = deltas[deltas.any(axis=1)]
+
+    x, y = points[0].tolist()
+    if not len(deltas):
+        return f"M{x} {y}"
+
+    return f"M{x} {y}l" + " ".join(f"{dx} {dy}" for dx, dy in deltas.tolist())
+
+
+def to_svg(display_list: DisplayList, canvas_size: Optional[int] = None, precision: int = 0) -> str:
+    """
+    Переводит display list в SVG без растеризации.
+    Координаты квантуются до `precision` знаков после запятой в пикселях холста `canvas_size`,
+    подряд идущие ломаные одного цвета, толщины и соединения сливаются в один <path>.
+
+    Прозрачность в SVG накладывается на каждую линию отдельно, а при растеризации —
+    на весь слой сразу, поэтому в местах пересечения линий цвет может немного отличаться.
+    """
+    canvas_size = canvas_size or display_list.canvas_size
+    kinds, offsets, points, colors, widths, joints = display_list.arrays
+
+    scale = canvas_size / display_list.canvas_size
+    points = np.round(points * scale, precision)
+    if precision <= 0:
+        points = points.astype(np.int64)
+
+    offsets = offsets.tolist()
+    fills = list(map(tuple, colors.tolist()))
+    line_widths = [max(1, int(width * (canvas_size / 1000))) for width in widths.tolist()]
+    joints = joints.tolist()
+
+    elements = [f'<rect width="{canvas_size}" height="{canvas_size}" fill="#fff"/>']
+    path: list[str] = []
+    path_style = None
+
+    def flush():
+        if path:
+            (color, opacity), width, joint = path_style
+            attrs = f'fill="none" stroke="{color}" stroke-width="{width}"'
+            if opacity is not None:
+                attrs += f' stroke-opacity="{opacity}"'
+            if JOINTS[joint] == "curve":
+                attrs += ' stroke-linejoin="round"'
+            elements.append(f'<path {attrs} d="{"".join(path)}"/>')
+            path.clear()
+
+    for i, kind in enumerate(kinds.tolist()):
+        item_points = points[offsets[i] : offsets[i + 1]]
+
+        if kind == POLYLINE:
+            style = (_color(fills[i]), line_widths[i], joints[i])
+            if style != path_style:
+                flush()
+                path_style = style
+            path.append(_subpath(item_points))
+        else:
+            flush()
+            path_style = None
+            (x0, y0), (x1, y1) = item_points.tolist()
+            color, opacity = _color(fills[i])
+            attrs = (
+                f'cx="{(x0 + x1) / 2:g}" cy="{(y0 + y1) / 2:g}" '
+                f'rx="{(x1 - x0) / 2:g}" ry="{(y1 - y0) / 2:g}" fill="{color}"'
+            )
+            if opacity is not None:
+                attrs += f' fill-opacity="{opacity}"'
+            elements.append(f"<ellipse {attrs}/>")
+
+    flush()
+
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{canvas_size}" height="{canvas_size}" '
+        f'viewBox="0 0 {canvas_size} {canvas_size}">' + "".join(elements) + "</svg>"
+    )
@@ -0,0 +1,123 @@
+import queue
+import threading
+import zipfile
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional
+
+from PIL import Image
+
+from imprint.core.metrics import bind, stage
+
+_DONE = object()
+
+
+class _EncodingCancelled(Exception): ...
+
+
+class _QueueWriter:
+    """Файлоподобный объект: режет поток байтов на куски и передает их в очередь."""
+
+    def __init__(self, chunks: queue.Queue, cancelled: threading.Event, chunk_size: int):
+        self.chunks = chunks
+        self.cancelled = cancelled
+        self.chunk_size = chunk_size
+        self._buffer = bytearray()
+
+    def put(self, item) -> None:
+        # Очередь ограничена: если клиент читает медленно, кодирование ждет (back-pressure)
+        while not self.cancelled.is_set():
+            try:
+                self.chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+        raise _EncodingCancelled
+
+    def write(self, data) -> int:
+        self._buffer += data
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+        return len(data)
+
+    def flush(self) -> None:
+        if self._buffer:
+            self.put(bytes(self._buffer))
+            self._buffer.clear()
+
+
+class ImageEncoderController:
+    """
+    Кодирование изображений в PNG с настраиваемым балансом скорость/размер.
+    compress_level — уровень zlib (0-9), compress_type — стратегия zlib
+    (-1 по умолчанию, 1 filtered, 2 huffman only, 3 rle, 4 fixed).
+    """
+
+    def __init__(
+        self,
+        compress_level: Optional[int] = None,
+        compress_type: Optional[int] = None,
+        chunk_size: int = 256 * 1024,
+        max_pending_chunks: int = 8,
+    ):
+        self.compress_level = 6 if compress_level is None else compress_level
+        self.compress_type = -1 if compress_type is None else compress_type
+        self.chunk_size = chunk_size
+        self.max_pending_chunks = max_pending_chunks
+
+    def save(self, image: Image.Image, fp: BinaryIO) -> None:
+        with stage("png_encode", canvas=image.width):
+            image.save(
+                fp,
+                format="PNG",
+                compress_level=self.compress_level,
+                compress_type=self.compress_type,
+            )
+
+    def iter_png(self, image: Image.Image) -> Iterator[bytes]:
+        return self.iter_write(lambda fp: self.save(image, fp))
+
+    def save_zip(self, named_images: Iterable[tuple[str, Image.Image]], fp: BinaryIO) -> None:
+        # PNG уже сжат, поэтому архив без сжатия (ZIP_STORED)
+        with zipfile.ZipFile(fp, mode="w", compression=zipfile.ZIP_STORED) as archive:
+            for name, image in named_images:
+                with archive.open(name, mode="w", force_zip64=True) as entry:
+                    self.save(image, entry)
+
+    def iter_zip(self, named_images: Iterable[tuple[str, Image.Image]]) -> Iterator[bytes]:
+        return self.iter_write(lambda fp: self.save_zip(named_images, fp))
+
+    def iter_write(self, write: Callable[[BinaryIO], None]) -> Iterator[bytes]:
+        """
+        Запускает `write(fp)` в отдельном потоке и отдает записанные байты кусками по мере появления,
+        не собирая результат целиком в памяти.
+        """
+        chunks = queue.Queue(maxsize=self.max_pending_chunks)
+        cancelled = threading.Event()
+
+        def produce():
+            writer = _QueueWriter(chunks, cancelled, self.chunk_size)
+            try:
+                write(writer)
+                writer.flush()
+                writer.put(_DONE)
+            except _EncodingCancelled:
+                pass
+            except Exception as e:
+                try:
+                    writer.put(e)
+                except _EncodingCancelled:
+                    pass
+
+        threading.Thread(target=bind(produce), name="image-encoder", daemon=True).start()
+
+        try:
+            while True:
+                item = chunks.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Клиент мог отключиться: останавливаем кодирование
+            cancelled.set()
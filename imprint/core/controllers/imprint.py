@@ -1,14 +1,24 @@
-from typing import Optional
+import codecs
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, Iterable, Optional
 
 from PIL import Image
 
+from imprint.core.cache import LRUCache
 from imprint.core.controllers.graphic_engine.base import GraphicEngineController
+from imprint.core.controllers.graphic_engine.cache import GeometryCache, RenderCache
+from imprint.core.controllers.graphic_engine.display_list import DisplayList
 from imprint.core.controllers.graphic_engine.drawers.base import DrawSettings
 from imprint.core.controllers.stego_crypt.base import StegoCryptController
 from imprint.core.controllers.text_analyzer.base import (
     TextAnalyzerController,
     TextMetrics,
 )
+from imprint.core.metrics import bind, stage
+
+
+class ImageTooLargeError(ValueError):
+    """Картинка больше допустимого числа пикселей."""
 
 
 class ImprintController:
@@ -18,31 +28,109 @@ class ImprintController:
         text_analyzer_controller: TextAnalyzerController,
         graphic_engine_controller: GraphicEngineController,
         stego_crypt_controller: StegoCryptController,
+        render_cache: Optional[RenderCache] = None,
+        geometry_cache: Optional[GeometryCache] = None,
+        max_image_pixels: Optional[int] = None,
+        documents_cache_max_bytes: Optional[int] = None,
     ):
+        """
+        max_image_pixels — предел ширина × высота для parse_file (None или 0 — без предела).
+        documents_cache_max_bytes — бюджет памяти в байтах на состояния анализа документов, чтобы после
+        дописывания текста в конец анализировать только новую часть (0 — не хранить).
+        """
         self.text_analyzer_controller = text_analyzer_controller
         self.graphic_engine_controller = graphic_engine_controller
         self.stego_crypt_controller = stego_crypt_controller
+        self.render_cache = render_cache
+        self.geometry_cache = geometry_cache
+        self.max_image_pixels = max_image_pixels
+        # Состояние держит хвост последнего слова и статистику символов, поэтому бюджет считается в байтах
+        self.documents = LRUCache(
+            max_bytes=64 * 1024 * 1024 if documents_cache_max_bytes is None else documents_cache_max_bytes,
+            sizeof=lambda checkpoint: checkpoint.nbytes,
+        )
+
+    @property
+    def _cache_enabled(self) -> bool:
+        # Картинка из кэша общая: встраивать в нее данные на месте нельзя
+        return self.render_cache is not None and bool(self.render_cache.max_bytes)
+
+    def build(self, draw_settings: DrawSettings, drawers=None) -> DisplayList:
+        """Геометрия слоев (display list); берется из кэша геометрии, если он включен."""
+        if self.geometry_cache is None or not self.geometry_cache.max_bytes:
+            return self.graphic_engine_controller.build(draw_settings, drawers=drawers)
+
+        key = self.geometry_cache.make_key(
+            draw_settings,
+            drawers or self.graphic_engine_controller.default_drawers,
+        )
+        display_list = self.geometry_cache.get(key)
+
+        if display_list is None:
+            display_list = self.graphic_engine_controller.build(draw_settings, drawers=drawers)
+            self.geometry_cache.put(key, display_list)
+
+        return display_list
+
+    def render(self, draw_settings: DrawSettings, drawers=None) -> Image.Image:
+        """
+        Отрисовывает графику без стего-слоя.
+        Картинка зависит только от DrawSettings и параметров слоев, поэтому берется из кэша, если он включен.
+        """
+        if not self._cache_enabled:
+            return self.graphic_engine_controller.rasterize(self.build(draw_settings, drawers=drawers))
+
+        key = self.render_cache.make_key(
+            draw_settings,
+            drawers or self.graphic_engine_controller.default_drawers,
+        )
+        image = self.render_cache.get(key)
+
+        if image is None:
+            image = self.graphic_engine_controller.rasterize(self.build(draw_settings, drawers=drawers))
+            self.render_cache.put(key, image)
+
+        return image
+
+    def _analyze(self, text: str, document_id: Optional[str] = None) -> TextMetrics:
+        with stage("analyze"):
+            if document_id is None or not self.documents.max_bytes:
+                return self.text_analyzer_controller.analyze(text)
+
+            metrics, checkpoint = self.text_analyzer_controller.analyze_appended(text, self.documents.get(document_id))
+            self.documents.put(document_id, checkpoint)
+            return metrics
+
+    @staticmethod
+    def _draw_settings(metrics: TextMetrics) -> DrawSettings:
+        return DrawSettings(
+            hash=metrics.hash,
+            canvas_size=metrics.canvas_size,
+            chars_stats=metrics.chars_stats,
+            symbols_count=metrics.symbols_count,
+        )
 
     def create(
         self,
         text: str,
         password: Optional[str] = None,
         drawers=None,
+        document_id: Optional[str] = None,
     ) -> Image.Image:
-        metrics: TextMetrics = self.text_analyzer_controller.analyze(text)
-        image: Image.Image = self.graphic_engine_controller.draw(
-            DrawSettings(
-                hash=metrics.hash,
-                canvas_size=metrics.canvas_size,
-                chars_stats=metrics.chars_stats,
-                symbols_count=metrics.symbols_count,
-            ),
+        """
+        document_id — документ, который дописывается в конец между вызовами: анализируется
+        только новая часть текста. Картинка от этого не меняется.
+        """
+        metrics: TextMetrics = self._analyze(text, document_id)
+        image: Image.Image = self.render(
+            self._draw_settings(metrics),
             drawers=drawers,
         )
         stego_image: Image.Image = self.stego_crypt_controller.encode(
             image,
             text,
             password,
+            in_place=not self._cache_enabled,
         )
 
         # import time
@@ -51,6 +139,119 @@ class ImprintController:
 
         return stego_image
 
+    def create_svg(self, text: str, drawers=None, size: Optional[int] = None) -> str:
+        """
+        Отпечаток в виде SVG для отображения: без растеризации и без стего-слоя,
+        поэтому текст из SVG обратно не извлекается. size — размер SVG вместо размера холста.
+        """
+        metrics: TextMetrics = self._analyze(text)
+        display_list = self.build(self._draw_settings(metrics), drawers=drawers)
+
+        return self.graphic_engine_controller.to_svg(display_list, size)
+
+    def create_preview(self, text: str, size: int, drawers=None) -> Image.Image:
+        """
+        Превью size × size для отображения: та же геометрия, что у отпечатка, растеризованная сразу
+        в нужный размер, без стего-слоя. Текст из превью не извлекается.
+        """
+        metrics: TextMetrics = self._analyze(text)
+        display_list = self.build(self._draw_settings(metrics), drawers=drawers)
+
+        return self.graphic_engine_controller.rasterize(display_list, size)
+
+    def create_from_stream(
+        self,
+        chunks: Iterable[bytes],
+        password: Optional[str] = None,
+        drawers=None,
+    ) -> Image.Image:
+        """
+        Создание отпечатка из потока байтов UTF-8 (файл, тело запроса).
+        Текст анализируется по мере чтения, а в памяти остаются только байты, которые нужно встроить.
+        """
+        data = bytearray()
+        decoder = codecs.getincrementaldecoder("utf-8")()
+
+        def read_text():
+            for chunk in chunks:
+                data.extend(chunk)
+                yield decoder.decode(chunk)
+            yield decoder.decode(b"", final=True)
+
+        with stage("analyze"):
+            metrics: TextMetrics = self.text_analyzer_controller.analyze(read_text())
+        image: Image.Image = self.render(
+            self._draw_settings(metrics),
+            drawers=drawers,
+        )
+
+        return self.stego_crypt_controller.encode(image, data, password, in_place=not self._cache_enabled)
+
+    def create_many(
+        self,
+        texts: list[str],
+        passwords: Optional[list[Optional[str]]] = None,
+        drawers=None,
+        max_workers: Optional[int] = None,
+        map_func: Optional[Callable[..., list]] = None,
+    ) -> list[Image.Image]:
+        """
+        Пакетное создание отпечатков.
+        Одинаковая графика (тот же хэш, статистика и слои) рисуется один раз,
+        разные картинки рисуются параллельно; стего-слой встраивается для каждого текста отдельно.
+        map_func(func, *iterables) -> list — как выполнять этапы параллельно (по умолчанию свой пул
+        из max_workers потоков); исполнитель передает свой, чтобы пакет шел через его ограничения.
+        """
+        passwords = passwords or [None] * len(texts)
+        if len(passwords) != len(texts):
+            raise ValueError("texts and passwords must have the same length")
+
+        drawers = drawers or self.graphic_engine_controller.default_drawers
+
+        if map_func is not None:
+            return self._create_many(texts, passwords, drawers, map_func)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return self._create_many(texts, passwords, drawers, lambda func, *items: list(pool.map(func, *items)))
+
+    def _create_many(
+        self,
+        texts: list[str],
+        passwords: list[Optional[str]],
+        drawers,
+        map_func: Callable[..., list],
+    ) -> list[Image.Image]:
+        metrics_list = map_func(bind(self._analyze), texts)
+
+        keys = []
+        unique: dict[str, DrawSettings] = {}
+        for metrics in metrics_list:
+            draw_settings = self._draw_settings(metrics)
+            key = RenderCache.make_key(draw_settings, drawers)
+            unique.setdefault(key, draw_settings)
+            keys.append(key)
+
+        rendered = map_func(bind(lambda item: self.render(item, drawers=drawers)), list(unique.values()))
+        renders = dict(zip(unique, rendered, strict=True))
+
+        return map_func(
+            bind(self.stego_crypt_controller.encode),
+            [renders[key] for key in keys],
+            texts,
+            passwords,
+        )
+
     def parse(self, image: Image, password: Optional[str] = None) -> str:
-        image = image.convert("RGB")
         return self.stego_crypt_controller.decode(image, password)
+
+    def parse_file(self, fp: BinaryIO, password: Optional[str] = None) -> str:
+        """
+        Читает отпечаток из PNG-файла за один проход.
+        Размер проверяется по заголовку PNG до распаковки, а распаковываются только строки с данными.
+        """
+        with stage("png_open"):
+            image = Image.open(fp, formats=["PNG"])
+        if self.max_image_pixels and image.width * image.height > self.max_image_pixels:
+            raise ImageTooLargeError(f"Image is too large: {image.width}x{image.height}")
+
+        return self.parse(image, password)
@@ -1,128 +1,317 @@
 import base64
+import hashlib
+import lzma
 import os
-from typing import Optional
+import zlib
+from typing import NamedTuple, Optional, Union
 
-from PIL import Image
 from cryptography.fernet import Fernet
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+from PIL import Image
+
+from imprint.core.cache import LRUCache
+from imprint.core.controllers.stego_crypt import lsb
+from imprint.core.metrics import stage
+
+# flag (1) + data_len (4) + salt (16)
+HEADER_SIZE = 21
+
+# Биты флага
+FLAG_ENCRYPTED = 0x01
+# После заголовка идет блок KDF: алгоритм (1) + его параметры. Без него — PBKDF2 со 100 000 итераций
+FLAG_KDF_HEADER = 0x02
+
+# Алгоритмы KDF и размер их параметров в байтах
+KDF_PBKDF2_SHA256 = 1  # итерации (4)
+KDF_SCRYPT = 2  # log2(n) (1) + r (1) + p (1)
+KDF_PARAMS_SIZE = {KDF_PBKDF2_SHA256: 4, KDF_SCRYPT: 3}
+
+# Текст сжат перед шифрованием (zlib или raw LZMA2)
+FLAG_ZLIB = 0x04
+FLAG_LZMA = 0x08
+
+KNOWN_FLAGS = FLAG_ENCRYPTED | FLAG_KDF_HEADER | FLAG_ZLIB | FLAG_LZMA
+
+LEGACY_KDF = (KDF_PBKDF2_SHA256, (100000,))
+
+# Наибольшая стоимость KDF, читаемая по умолчанию: 1 000 000 итераций PBKDF2, scrypt до 256 МБ памяти
+DEFAULT_KDF_MAX_ITERATIONS = 1000000
+DEFAULT_KDF_MAX_SCRYPT_N = 2**17
+DEFAULT_KDF_MAX_SCRYPT_R = 16
+DEFAULT_KDF_MAX_SCRYPT_P = 4
+
+# Короче этого текст не сжимается: выигрыш меньше накладных расходов
+COMPRESS_MIN_SIZE = 64
+# Быстрый уровень: более сильное сжатие стоит дороже, чем экономит на записи битов
+ZLIB_LEVEL = 1
+# LZMA сжимает заметно лучше, но в разы медленнее: используется, только если после zlib данные не помещаются
+LZMA_FILTERS = [{"id": lzma.FILTER_LZMA2, "preset": 6}]
+# Предел размера распакованного текста по умолчанию
+DEFAULT_MAX_TEXT_BYTES = 64 * 1024 * 1024
+
+
+class StegoHeader(NamedTuple):
+    flag: int
+    data_len: int
+    salt: bytes
+    kdf: tuple[int, tuple]
+
+    @property
+    def encrypted(self) -> bool:
+        return bool(self.flag & FLAG_ENCRYPTED)
 
 
 class StegoCryptController:
+    """
+    kdf_algorithm — "pbkdf2" или "scrypt" для новых отпечатков; параметры пишутся в блок KDF,
+    поэтому отпечатки с другой стоимостью (и старые, без блока) читаются как раньше.
+    key_cache_size — сколько выведенных ключей хранить для повторных decode той же картинки с тем же паролем.
+    kdf_max_* — наибольшая стоимость KDF, которую можно прочитать из блока KDF: чужая картинка
+    не должна заставлять сервер часами считать ключ или выделять гигабайты памяти.
+    compression — сжимать текст перед шифрованием и встраиванием: zlib, а если не хватает емкости картинки — LZMA.
+    max_text_bytes — предел размера распакованного текста (0 — без предела): защита от «бомб» в сжатой нагрузке.
+    """
 
-    def _generate_key(self, password: str, salt: bytes) -> bytes:
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-            backend=default_backend(),
-        )
-        return base64.urlsafe_b64encode(kdf.derive(password.encode()))
-
-    def _encrypt_text(self, text: str, password: str) -> tuple[bytes, bytes]:
-        salt = os.urandom(16)
-        key = self._generate_key(password, salt)
-        f = Fernet(key)
-        encrypted_data = f.encrypt(text.encode("utf-8"))
-        return salt, encrypted_data
+    def __init__(
+        self,
+        kdf_algorithm: Optional[str] = None,
+        kdf_iterations: Optional[int] = None,
+        kdf_scrypt_n: Optional[int] = None,
+        kdf_scrypt_r: Optional[int] = None,
+        kdf_scrypt_p: Optional[int] = None,
+        key_cache_size: Optional[int] = None,
+        kdf_max_iterations: Optional[int] = None,
+        kdf_max_scrypt_n: Optional[int] = None,
+        kdf_max_scrypt_r: Optional[int] = None,
+        kdf_max_scrypt_p: Optional[int] = None,
+        compression: Optional[bool] = None,
+        max_text_bytes: Optional[int] = None,
+    ):
+        if (kdf_algorithm or "pbkdf2") == "pbkdf2":
+            self.kdf = (KDF_PBKDF2_SHA256, (kdf_iterations or 100000,))
+        elif kdf_algorithm == "scrypt":
+            n = kdf_scrypt_n or 2**14
+            if n & (n - 1):
+                raise ValueError("scrypt n must be a power of two")
+            self.kdf = (KDF_SCRYPT, (n.bit_length() - 1, kdf_scrypt_r or 8, kdf_scrypt_p or 1))
+        else:
+            raise ValueError(f"Unknown KDF algorithm: {kdf_algorithm}")
+
+        self.kdf_max_iterations = kdf_max_iterations or DEFAULT_KDF_MAX_ITERATIONS
+        self.kdf_max_scrypt_n = kdf_max_scrypt_n or DEFAULT_KDF_MAX_SCRYPT_N
+        self.kdf_max_scrypt_r = kdf_max_scrypt_r or DEFAULT_KDF_MAX_SCRYPT_R
+        self.kdf_max_scrypt_p = kdf_max_scrypt_p or DEFAULT_KDF_MAX_SCRYPT_P
+        # Свои отпечатки должны читаться тем же контроллером
+        self._check_kdf(self.kdf)
+
+        self.compression = True if compression is None else compression
+        self.max_text_bytes = DEFAULT_MAX_TEXT_BYTES if max_text_bytes is None else max_text_bytes
+
+        # Ограничение по числу ключей: каждый ключ считается размером 1
+        self._keys = LRUCache(max_bytes=256 if key_cache_size is None else key_cache_size, sizeof=lambda key: 1)
+
+    @staticmethod
+    def _kdf_block(kdf: tuple[int, tuple]) -> bytes:
+        algorithm, params = kdf
+        if algorithm == KDF_PBKDF2_SHA256:
+            return bytes([algorithm]) + params[0].to_bytes(4, "big")
+        return bytes([algorithm, *params])
+
+    def _check_kdf(self, kdf: tuple[int, tuple]) -> None:
+        algorithm, params = kdf
+        if algorithm == KDF_PBKDF2_SHA256:
+            if not 0 < params[0] <= self.kdf_max_iterations:
+                raise ValueError(f"PBKDF2 iterations out of range: {params[0]}")
+            return
+
+        log_n, r, p = params
+        if not 0 < log_n < 64 or 2**log_n > self.kdf_max_scrypt_n:
+            raise ValueError(f"scrypt n out of range: 2**{log_n}")
+        if not 0 < r <= self.kdf_max_scrypt_r or not 0 < p <= self.kdf_max_scrypt_p:
+            raise ValueError(f"scrypt r/p out of range: {r}/{p}")
+
+    def _read_kdf(self, reader: lsb.LSBReader) -> tuple[int, tuple]:
+        algorithm = reader.read(1)[0]
+        if algorithm not in KDF_PARAMS_SIZE:
+            raise ValueError(f"Unknown KDF algorithm id: {algorithm}")
+
+        params = reader.read(KDF_PARAMS_SIZE[algorithm])
+        if algorithm == KDF_PBKDF2_SHA256:
+            kdf = algorithm, (int.from_bytes(params, "big"),)
+        else:
+            kdf = algorithm, tuple(params)
+
+        self._check_kdf(kdf)
+        return kdf
+
+    def _generate_key(
+        self,
+        password: str,
+        salt: bytes,
+        kdf: tuple[int, tuple] = LEGACY_KDF,
+        cache: bool = True,
+    ) -> bytes:
+        """cache=False — ключ для новой случайной соли: повторно он не понадобится, кэш его не хранит."""
+        # В ключе кэша не храним сам пароль
+        cache_key = (hashlib.sha256(password.encode()).digest(), salt, kdf)
+        key = self._keys.get(cache_key) if cache else None
+        if key is not None:
+            return key
 
-    def _decrypt_text(self, encrypted_data: bytes, salt: bytes, password: str) -> str:
-        key = self._generate_key(password, salt)
+        algorithm, params = kdf
+        if algorithm == KDF_PBKDF2_SHA256:
+            derivation = PBKDF2HMAC(
+                algorithm=hashes.SHA256(),
+                length=32,
+                salt=salt,
+                iterations=params[0],
+                backend=default_backend(),
+            )
+        else:
+            log_n, r, p = params
+            derivation = Scrypt(salt=salt, length=32, n=2**log_n, r=r, p=p, backend=default_backend())
+
+        with stage("kdf"):
+            key = base64.urlsafe_b64encode(derivation.derive(password.encode()))
+        if cache:
+            self._keys.put(cache_key, key)
+        return key
+
+    def _decrypt(self, encrypted_data: bytes, salt: bytes, password: str, kdf: tuple[int, tuple]) -> bytes:
+        key = self._generate_key(password, salt, kdf)
         f = Fernet(key)
-        decrypted_data = f.decrypt(encrypted_data)
-        return decrypted_data.decode("utf-8")
+        with stage("decrypt"):
+            return f.decrypt(encrypted_data)
+
+    def _compress(self, data: bytes, strong: bool = False) -> tuple[int, bytes]:
+        """
+        Возвращает (флаг сжатия, данные); несжатые данные, если сжатие не дает выигрыша.
+        strong — LZMA вместо zlib.
+        """
+        if not self.compression or len(data) < COMPRESS_MIN_SIZE:
+            return 0, data
+
+        if strong:
+            flag, compressed = FLAG_LZMA, lzma.compress(data, format=lzma.FORMAT_RAW, filters=LZMA_FILTERS)
+        else:
+            flag, compressed = FLAG_ZLIB, zlib.compress(data, ZLIB_LEVEL)
+
+        return (flag, compressed) if len(compressed) < len(data) else (0, data)
+
+    def _decompress(self, flag: int, data: bytes) -> bytes:
+        if flag & FLAG_LZMA:
+            decompressor = lzma.LZMADecompressor(format=lzma.FORMAT_RAW, filters=LZMA_FILTERS)
+        elif flag & FLAG_ZLIB:
+            decompressor = zlib.decompressobj()
+        else:
+            return data
+
+        # Распаковываем на байт больше предела: так превышение видно без распаковки всей нагрузки
+        if self.max_text_bytes:
+            text = decompressor.decompress(data, self.max_text_bytes + 1)
+            if len(text) > self.max_text_bytes:
+                raise ValueError("Decompressed text exceeds size limit")
+        else:
+            text = decompressor.decompress(data)
+
+        if not decompressor.eof:
+            raise ValueError("Compressed payload is truncated")
+        return text
+
+    def prepare_data(self, text: Union[str, bytes], password: str = None, strong_compression: bool = False) -> bytes:
+        """text — строка или уже закодированный в UTF-8 текст."""
+        text_bytes = text.encode("utf-8") if isinstance(text, str) else text
 
-    def prepare_data(self, text: str, password: str = None) -> bytes:
-        text_bytes = text.encode("utf-8")
+        with stage("compress"):
+            compression_flag, text_bytes = self._compress(text_bytes, strong=strong_compression)
 
         if password:
             salt = os.urandom(16)
-            key = self._generate_key(password, salt)
+            key = self._generate_key(password, salt, self.kdf, cache=False)
             f = Fernet(key)
-            encrypted_data = f.encrypt(text_bytes)
+            with stage("encrypt"):
+                encrypted_data = f.encrypt(bytes(text_bytes))
 
-            flag = b"\x01"
+            flag = bytes([FLAG_ENCRYPTED | FLAG_KDF_HEADER | compression_flag])
             data_len = len(encrypted_data).to_bytes(4, "big")
-            return flag + data_len + salt + encrypted_data
+            return flag + data_len + salt + self._kdf_block(self.kdf) + encrypted_data
         else:
-            flag = b"\x00"
+            flag = bytes([compression_flag])
             data_len = len(text_bytes).to_bytes(4, "big")
             dummy_salt = b"\x00" * 16
             return flag + data_len + dummy_salt + text_bytes
 
-    def encode(self, image: Image, text: str, password: Optional[str] = None) -> Image:
+    def encode(
+        self,
+        image: Image,
+        text: Union[str, bytes],
+        password: Optional[str] = None,
+        in_place: bool = False,
+    ) -> Image:
+        """in_place — встроить данные прямо в переданное RGB-изображение без копии."""
         data = self.prepare_data(text, password)
+        if self.compression and len(data) * 8 > lsb.capacity(image):
+            data = self.prepare_data(text, password, strong_compression=True)
 
-        pixels = list(image.getdata())
+        with stage("lsb_embed", canvas=image.width):
+            return lsb.embed(image, data, in_place=in_place)
 
-        data_bits = "".join(f"{b:08b}" for b in data)
-        data_len = len(data_bits)
-
-        if data_len > len(pixels) * 3:
-            raise ValueError("Слишком много данных для этого изображения!")
-
-        new_pixels = []
-        bit_index = 0
-
-        for r, g, b, a in pixels:
-            if bit_index < data_len:
-                r = (r & ~1) | int(data_bits[bit_index])
-                bit_index += 1
-            if bit_index < data_len:
-                g = (g & ~1) | int(data_bits[bit_index])
-                bit_index += 1
-            if bit_index < data_len:
-                b = (b & ~1) | int(data_bits[bit_index])
-                bit_index += 1
-
-            new_pixels.append((r, g, b, a))
-            if bit_index >= data_len:
-                break
+    def read_header(self, reader: lsb.LSBReader) -> StegoHeader:
+        """Читает и проверяет заголовок и блок KDF; reader остается на начале нагрузки."""
+        header = reader.read(HEADER_SIZE)
+        flag = header[0]
+        data_len = int.from_bytes(header[1:5], "big")
 
-        new_pixels.extend(pixels[len(new_pixels) :])
+        if flag & ~KNOWN_FLAGS:
+            raise ValueError(f"Unknown header flags: {flag:#04x}")
+        if flag & FLAG_ZLIB and flag & FLAG_LZMA:
+            raise ValueError("Conflicting compression flags")
+        if flag & FLAG_KDF_HEADER and not flag & FLAG_ENCRYPTED:
+            raise ValueError("KDF block without encryption")
 
-        stegano_image = Image.new("RGB", image.size)
-        stegano_image.putdata(new_pixels)
+        kdf = self._read_kdf(reader) if flag & FLAG_KDF_HEADER else LEGACY_KDF
 
-        return stegano_image
+        if reader.position + data_len * 8 > lsb.capacity(reader.image):
+            raise ValueError("Payload length exceeds image capacity")
 
-    def _decode(self, image: Image, data_len_bytes: int) -> bytes:
-        pixels = image.getdata()
+        return StegoHeader(flag, data_len, header[5:21], kdf)
 
-        extracted_bits = []
-        bits_to_extract = data_len_bytes * 8
+    def _unpack(self, header: StegoHeader, payload: bytes, password: Optional[str]) -> str:
+        if header.encrypted:
+            if not password:
+                raise ValueError("Password mismatch")
+            payload = self._decrypt(payload, header.salt, password, header.kdf)
 
-        for r, g, b in pixels:
-            if len(extracted_bits) < bits_to_extract:
-                extracted_bits.append(str(r & 1))
-            if len(extracted_bits) < bits_to_extract:
-                extracted_bits.append(str(g & 1))
-            if len(extracted_bits) < bits_to_extract:
-                extracted_bits.append(str(b & 1))
-            if len(extracted_bits) >= bits_to_extract:
-                break
+        with stage("decompress"):
+            return self._decompress(header.flag, payload).decode("utf-8")
 
-        byte_chunks = [
-            "".join(extracted_bits[i : i + 8]) for i in range(0, bits_to_extract, 8)
-        ]
-        extracted_data = bytes([int(chunk, 2) for chunk in byte_chunks])
+    def decode(self, image: Image, password: str = None) -> str:
+        """
+        Читает заголовок, а затем нагрузку с того места, где он закончился.
+        Изображение может быть лениво открытым PNG: распакуются только строки с данными.
+        """
+        with stage("lsb_extract", canvas=image.width):
+            reader = lsb.LSBReader(image)
+            header = self.read_header(reader)
+            payload = reader.read(header.data_len)
 
-        return extracted_data
+        return self._unpack(header, payload, password)
 
-    def decode(self, image: Image, password: str = None) -> str:
-        header = self._decode(image, 21)
-        is_encrypted = header[0] == 0x01
-        data_len = int.from_bytes(header[1:5], "big")
-        salt = header[5:21]
+    def verify(self, image: Image, password: Optional[str] = None, read_payload: bool = True) -> StegoHeader:
+        """
+        Проверяет, что отпечаток читается: заголовок, длина нагрузки и, где возможно, сам текст.
+        Зашифрованная нагрузка расшифровывается, только если передан пароль. Ошибки — исключения.
+        read_payload=False — только заголовок: распаковываются лишь первые строки PNG.
+        """
+        reader = lsb.LSBReader(image)
+        header = self.read_header(reader)
 
-        total_data = self._decode(image, 21 + data_len)
-        payload = total_data[21:]
+        if read_payload:
+            payload = reader.read(header.data_len)
+            if not header.encrypted or password:
+                self._unpack(header, payload, password)
 
-        if is_encrypted:
-            if not password:
-                raise ValueError("Password mismatch")
-            return self._decrypt_text(payload, salt, password)
-        else:
-            return payload.decode("utf-8")
+        return header
@@ -0,0 +1,111 @@
+import numpy as np
+from PIL import Image, PngImagePlugin
+
+# Один бит полезной нагрузки на каждый канал R, G, B
+CHANNELS = 3
+
+
+def capacity(image: Image.Image) -> int:
+    """Сколько бит можно спрятать в изображении."""
+    return image.width * image.height * CHANNELS
+
+
+def rows_for_bits(width: int, bits_count: int) -> int:
+    """Количество верхних строк, которые содержат первые `bits_count` бит."""
+    return -(-bits_count // (width * CHANNELS))
+
+
+def embed(image: Image.Image, data: bytes, in_place: bool = False) -> Image.Image:
+    """
+    Записывает `data` в младшие биты каналов R, G, B (бит за битом, старший бит первым).
+    Работает с сырым буфером: копируются и меняются только строки, в которые попадает нагрузка.
+    in_place — менять само RGB-изображение, а не его копию.
+    """
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+
+    if bits.size > capacity(image):
+        raise ValueError("Слишком много данных для этого изображения!")
+
+    if image.mode != "RGB":
+        stegano_image = image.convert("RGB")
+    else:
+        stegano_image = image if in_place else image.copy()
+    if not bits.size:
+        return stegano_image
+
+    box = (0, 0, image.width, rows_for_bits(image.width, bits.size))
+    region = np.frombuffer(stegano_image.crop(box).tobytes(), dtype=np.uint8).copy()
+    region[: bits.size] &= 0xFE
+    region[: bits.size] |= bits
+
+    stegano_image.paste(Image.frombytes("RGB", (box[2], box[3]), region), box)
+
+    return stegano_image
+
+
+def extract(image: Image.Image, data_len_bytes: int) -> bytes:
+    """Читает первые `data_len_bytes` байт из младших битов каналов R, G, B."""
+    return LSBReader(image).read(data_len_bytes)
+
+
+def _is_lazy_png(image: Image.Image) -> bool:
+    return (
+        isinstance(image, PngImagePlugin.PngImageFile)
+        and image.fp is not None
+        and len(image.tile) == 1
+        and not image.info.get("interlace")
+    )
+
+
+def _load_rows(image: Image.Image, top: int, bottom: int) -> bytes:
+    """
+    Возвращает RGB-байты строк [top, bottom).
+    Для еще не загруженного PNG распаковываются только строки до `bottom`,
+    остальная часть холста не декодируется.
+    """
+    if _is_lazy_png(image):
+        tile = image.tile[0]
+        partial = Image.open(image.fp, formats=["PNG"])
+        partial._size = (image.width, bottom)
+        partial.tile = [tile._replace(extents=(0, 0, image.width, bottom))]
+        region = partial.crop((0, top, image.width, bottom))
+    else:
+        region = image.crop((0, top, image.width, bottom))
+
+    if region.mode != "RGB":
+        region = region.convert("RGB")
+
+    return region.tobytes()
+
+
+class LSBReader:
+    """
+    Потоковое чтение нагрузки из младших битов.
+    Каждое следующее `read` продолжает с места, где остановилось предыдущее,
+    и подгружает только недостающие строки изображения.
+    """
+
+    def __init__(self, image: Image.Image):
+        self.image = image
+        self.position = 0  # Позиция в битах от начала изображения
+        self._channels = np.empty(0, dtype=np.uint8)
+        self._rows = 0
+
+    def read(self, size: int) -> bytes:
+        end = self.position + size * 8
+
+        if end > capacity(self.image):
+            raise ValueError("Изображение не содержит столько данных")
+        if not size:
+            return b""
+
+        rows = rows_for_bits(self.image.width, end)
+        if rows > self._rows:
+            chunk = _load_rows(self.image, self._rows, rows)
+            self._channels = np.concatenate([self._channels, np.frombuffer(chunk, dtype=np.uint8)])
+            self._rows = rows
+
+        bits = self._channels[self.position : end] & 1
+        self.position = end
+
+        return np.packbits(bits).tobytes()
@@ -2,20 +2,150 @@ import collections
 import hashlib
 import math
 import re
+import sys
 import uuid
-from typing import Generator
+from typing import Generator, Iterable, Iterator, Optional, Union
 
 from pydantic import BaseModel
 
+# Размер куска, которым текст проходит через анализ
+CHUNK_SIZE = 1024 * 1024
+
 
 class TextMetrics(BaseModel):
-    text: str
+    # None, если текст пришел потоком и целиком не хранится
+    text: Optional[str] = None
     hash: str
     canvas_size: int
     chars_stats: list[tuple]
     symbols_count: int
 
 
+class _AnalysisState:
+    """
+    Состояние однопроходного анализа текста, который поступает кусками.
+    Хэш префикса " ".join(words[: idx + 1]) считается одним инкрементальным md5,
+    состояние которого снимается на словах 0, 1, 2, 4, 8... и на последнем слове.
+    """
+
+    def __init__(self):
+        self.length = 0
+        self.chars_stats = collections.Counter()
+
+        self._md5 = hashlib.md5()
+        self._md5_fed = False
+        self._words_count = 0
+        self._next_index = 0
+        self._last_snapshot = -1
+        self._hash_parts: list[str] = []
+        # Куски слова, которое может продолжиться в следующем куске
+        self._tail: list[str] = []
+
+    def feed(self, chunk: str) -> None:
+        self.length += len(chunk)
+        self.chars_stats.update(chunk)
+        if not chunk:
+            return
+
+        # Кусок без пробелов (CJK, base64) только удлиняет слово: храним куски, а не склеиваем строку
+        # заново на каждом шаге, иначе текст без пробелов анализируется за квадратичное время
+        if chunk.split(None, 1) == [chunk]:
+            self._tail.append(chunk)
+            return
+
+        text = "".join(self._tail) + chunk
+        words = text.split()
+
+        if words and not text[-1].isspace():
+            self._tail = [words.pop()]
+        else:
+            self._tail = []
+
+        self._feed_words(words)
+
+    def _feed_words(self, words: list[str]) -> None:
+        base = self._words_count
+        position = 0
+
+        while position < len(words):
+            # Кусок слов до следующей контрольной позиции хэшируется одной строкой
+            target = min(len(words), self._next_index - base + 1)
+            self._update(" ".join(words[position:target]))
+            position = target
+
+            if base + target - 1 == self._next_index:
+                self._snapshot()
+                self._next_index = max(1, self._next_index * 2)
+
+        self._words_count = base + len(words)
+
+    def _update(self, segment: str) -> None:
+        if self._md5_fed:
+            self._md5.update(b" ")
+        self._md5.update(segment.encode())
+        self._md5_fed = True
+
+    def _snapshot(self) -> None:
+        # Берем только 4 символа от каждого среза, чтобы хэш не был гигантским
+        self._hash_parts.append(self._md5.copy().hexdigest()[:4])
+        self._last_snapshot = self._next_index
+
+    @property
+    def nbytes(self) -> int:
+        """Примерный объем памяти состояния: хвост слова, статистика символов и срезы хэша."""
+        return (
+            sys.getsizeof(self)
+            + sum(sys.getsizeof(piece) for piece in self._tail)
+            + sys.getsizeof(self.chars_stats)
+            + sum(sys.getsizeof(char) + sys.getsizeof(count) for char, count in self.chars_stats.items())
+            + sum(sys.getsizeof(part) for part in self._hash_parts)
+        )
+
+    def copy(self) -> "_AnalysisState":
+        state = _AnalysisState.__new__(_AnalysisState)
+        state.__dict__.update(self.__dict__)
+        state.chars_stats = self.chars_stats.copy()
+        state._md5 = self._md5.copy()
+        state._hash_parts = list(self._hash_parts)
+        state._tail = list(self._tail)
+        return state
+
+    def finish(self) -> str:
+        if self._tail:
+            self._feed_words(["".join(self._tail)])
+            self._tail = []
+
+        if not self._words_count:
+            return hashlib.md5(b"").hexdigest()
+
+        # Последнее слово добавляется обязательно, если на нем еще не было среза
+        if self._last_snapshot != self._words_count - 1:
+            self._hash_parts.append(self._md5.copy().hexdigest()[:4])
+            self._last_snapshot = self._words_count - 1
+
+        return "".join(self._hash_parts)
+
+
+class AnalysisCheckpoint:
+    """
+    Состояние анализа после префикса документа: текст, дописанный в конец,
+    анализируется с этого места. length — длина префикса в символах, size — в байтах UTF-8,
+    digest — sha256 префикса, по нему проверяется, что начало не менялось.
+    """
+
+    __slots__ = ("length", "size", "digest", "state")
+
+    def __init__(self, length: int, size: int, digest: bytes, state: _AnalysisState):
+        self.length = length
+        self.size = size
+        self.digest = digest
+        self.state = state
+
+    @property
+    def nbytes(self) -> int:
+        return sys.getsizeof(self) + sys.getsizeof(self.digest) + self.state.nbytes
+
+
 class TextAnalyzerController:
     def __init__(
         self,
@@ -96,55 +226,81 @@ class TextAnalyzerController:
 
         return full_hash
 
-    import hashlib
-
     def get_logarithmic_hash(self, text: str) -> str:
         """
         Создает хэш, который растет по мере добавления слов,
         но не линейно, а логарифмически (1, 2, 4, 8, 16...).
         """
-        words = text.split()
-        if not words:
-            return hashlib.md5(b"").hexdigest()
+        state = _AnalysisState()
+        for chunk in self._iter_chunks(text):
+            state.feed(chunk)
 
-        full_hash = ""
-        # Мы будем брать хэши от префиксов на позициях 2^n
-        indices = [0]  # Всегда берем первое слово
-        i = 1
-        while i < len(words):
-            indices.append(i)
-            i *= 2  # Логарифмический шаг
-
-        # Добавляем последнее слово обязательно, если его еще нет
-        if (len(words) - 1) not in indices:
-            indices.append(len(words) - 1)
-
-        for idx in indices:
-            # Хэшируем срез текста от начала до контрольного слова
-            prefix = " ".join(words[: idx + 1])
-            # Берем только 4 символа от каждого среза, чтобы хэш не был гигантским
-            chunk = hashlib.md5(prefix.encode()).hexdigest()[:4]
-            full_hash += chunk
+        return state.finish()
 
-        return full_hash
+    @staticmethod
+    def _iter_chunks(text: str) -> Iterator[str]:
+        for start in range(0, len(text), CHUNK_SIZE):
+            yield text[start : start + CHUNK_SIZE]
 
-    def analyze(self, text: str) -> TextMetrics:
+    def analyze(self, text: Union[str, Iterable[str]]) -> TextMetrics:
+        """
+        text — строка или итерируемый поток кусков текста.
+        Для потока текст целиком не собирается и в TextMetrics.text не сохраняется.
+        """
         # SimHash
         # hash = Simhash(self._get_features(text), f=self.hash_dimension)
         # hash = f"{hash.value:x}"
 
-        # Logarithmic hash
-        hash = self.get_logarithmic_hash(text)
+        chunks = self._iter_chunks(text) if isinstance(text, str) else text
+
+        # Логарифмический хэш и статистика символов за один проход по тексту
+        state = _AnalysisState()
+        for chunk in chunks:
+            state.feed(chunk)
+
+        return self._metrics(state, text if isinstance(text, str) else None)
+
+    def analyze_appended(
+        self,
+        text: str,
+        checkpoint: Optional[AnalysisCheckpoint] = None,
+    ) -> tuple[TextMetrics, AnalysisCheckpoint]:
+        """
+        Анализ документа, который дописывается в конец. Если text начинается с префикса из checkpoint,
+        анализируется только дописанная часть, иначе — весь текст. Результат совпадает с analyze(text).
+        Возвращает метрики и checkpoint для следующей правки.
+        """
+        encoded = text.encode("utf-8")
+
+        if (
+            checkpoint is not None
+            and len(encoded) >= checkpoint.size
+            and hashlib.sha256(memoryview(encoded)[: checkpoint.size]).digest() == checkpoint.digest
+        ):
+            state = checkpoint.state.copy()
+            start = checkpoint.length
+        else:
+            state = _AnalysisState()
+            start = 0
+
+        for chunk in self._iter_chunks(text[start:]):
+            state.feed(chunk)
+
+        # finish() дописывает хвост в состояние, поэтому checkpoint снимается до него
+        checkpoint = AnalysisCheckpoint(len(text), len(encoded), hashlib.sha256(encoded).digest(), state.copy())
+
+        return self._metrics(state, text), checkpoint
 
-        chars_stats = collections.Counter(text)
-        sorted(chars_stats.items(), key=lambda item: ord(item[0]))
+    def _metrics(self, state: _AnalysisState, text: Optional[str]) -> TextMetrics:
+        hash = state.finish()
 
-        return TextMetrics(
+        # Значения посчитаны здесь же, повторная валидация модели не нужна
+        return TextMetrics.model_construct(
             text=text,
             hash=hash,
-            canvas_size=self._calculate_canvas_size(len(text)),
-            chars_stats=chars_stats.items(),
-            symbols_count=len(text) if text else 1,
+            canvas_size=self._calculate_canvas_size(state.length),
+            chars_stats=list(state.chars_stats.items()),
+            symbols_count=state.length if state.length else 1,
         )
 
 
@@ -0,0 +1,157 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Callable, Iterator, NamedTuple, Optional
+
+
+class StageTiming(NamedTuple):
+    name: str
+    labels: dict
+    seconds: float
+
+
+# Замеры текущего запроса; None — замер выключен, и stage() ничего не делает
+_stages: ContextVar[Optional[list[StageTiming]]] = ContextVar("imprint_stages", default=None)
+
+_NOOP = nullcontext()
+
+
+class _Stage:
+    __slots__ = ("stages", "name", "labels", "started")
+
+    def __init__(self, stages: list[StageTiming], name: str, labels: dict):
+        self.stages = stages
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.stages.append(StageTiming(self.name, self.labels, time.perf_counter() - self.started))
+
+
+def stage(name: str, **labels):
+    """
+    Замер этапа: `with stage("kdf"): ...`.
+    Вне collect() возвращает общий пустой контекст, поэтому выключенный замер почти ничего не стоит.
+    """
+    stages = _stages.get()
+    if stages is None:
+        return _NOOP
+    return _Stage(stages, name, labels)
+
+
+def collecting() -> bool:
+    return _stages.get() is not None
+
+
+@contextmanager
+def collect(stages: Optional[list[StageTiming]] = None) -> Iterator[list[StageTiming]]:
+    """Включает замер этапов в текущем контексте; замеры добавляются в `stages`."""
+    stages = [] if stages is None else stages
+    token = _stages.set(stages)
+    try:
+        yield stages
+    finally:
+        _stages.reset(token)
+
+
+def bind(func: Callable) -> Callable:
+    """
+    Переносит замер в другой поток: потоки пула и threading.Thread не наследуют контекст.
+    Один Context нельзя войти из нескольких потоков сразу, поэтому переносится сам список замеров.
+    """
+    stages = _stages.get()
+    if stages is None:
+        return func
+
+    def run(*args, **kwargs):
+        with collect(stages):
+            return func(*args, **kwargs)
+
+    return run
+
+
+def extend(stages: list[StageTiming]) -> None:
+    """Добавляет замеры, сделанные в другом процессе."""
+    current = _stages.get()
+    if current is not None:
+        current.extend(stages)
+
+
+# Верхние границы групп размера холста для меток
+CANVAS_BUCKETS = (1000, 2000, 4000, 8000)
+# Границы гистограмм в секундах
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def canvas_bucket(canvas_size: int) -> str:
+    index = bisect.bisect_left(CANVAS_BUCKETS, canvas_size)
+    return str(CANVAS_BUCKETS[index]) if index < len(CANVAS_BUCKETS) else f"{CANVAS_BUCKETS[-1]}+"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class StageMetrics:
+    """
+    Гистограммы длительности этапов в формате Prometheus.
+    Ряды различаются именем этапа и его метками; размер холста заменяется группой (canvas_bucket).
+    """
+
+    def __init__(self, name: str = "imprint_stage_seconds", buckets: tuple[float, ...] = SECONDS_BUCKETS):
+        self.name = name
+        self.buckets = buckets
+        # метки -> (счетчики по границам, сумма, количество)
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stages: list[StageTiming]) -> None:
+        with self._lock:
+            for timing in stages:
+                labels = {"stage": timing.name, **timing.labels}
+                if "canvas" in labels:
+                    labels["canvas"] = canvas_bucket(labels["canvas"])
+                key = tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+                series = self._series.get(key)
+                if series is None:
+                    series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+
+                index = bisect.bisect_left(self.buckets, timing.seconds)
+                if index < len(self.buckets):
+                    series[0][index] += 1
+                series[1] += timing.seconds
+                series[2] += 1
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} Duration of imprint pipeline stages in seconds.",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                labels = ",".join(f'{name}="{_escape(value)}"' for name, value in key)
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts, strict=True):
+                    cumulative += bucket_count
+                    lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {count}')
+                lines.append(f"{self.name}_sum{{{labels}}} {total}")
+                lines.append(f"{self.name}_count{{{labels}}} {count}")
+
+        return "\n".join(lines) + "\n"
+
+
+def server_timing(stages: list[StageTiming]) -> str:
+    """Значение заголовка Server-Timing: длительности одноименных этапов складываются."""
+    totals: dict[str, float] = {}
+    for timing in stages:
+        name = timing.name if "drawer" not in timing.labels else f"{timing.name}.{timing.labels['drawer']}"
+        totals[name] = totals.get(name, 0.0) + timing.seconds
+
+    return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in totals.items())
@@ -1,4 +1,54 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 
-class Settings(BaseSettings): ...
+class Settings(BaseSettings):
+    # Кэш отрисованной графики: бюджет памяти в байтах (0 — выключен) и каталог для дискового уровня
+    render_cache_max_bytes: int = 512 * 1024 * 1024
+    render_cache_dir: Optional[str] = None
+    # Кэш геометрии слоев (display list): бюджет памяти в байтах (0 — выключен) и каталог для дискового уровня
+    geometry_cache_max_bytes: int = 64 * 1024 * 1024
+    geometry_cache_dir: Optional[str] = None
+
+    # KDF для паролей новых отпечатков: "pbkdf2" (kdf_iterations) или "scrypt" (n — степень двойки, r, p);
+    # kdf_key_cache_size — сколько выведенных ключей хранить для повторных decode (0 — не хранить)
+    kdf_algorithm: str = "pbkdf2"
+    kdf_iterations: int = 100000
+    kdf_scrypt_n: int = 2**14
+    kdf_scrypt_r: int = 8
+    kdf_scrypt_p: int = 1
+    kdf_key_cache_size: int = 256
+    # Наибольшая стоимость KDF из блока KDF читаемого отпечатка; больше — отпечаток отклоняется до вывода ключа
+    kdf_max_iterations: int = 1000000
+    kdf_max_scrypt_n: int = 2**17
+    kdf_max_scrypt_r: int = 16
+    kdf_max_scrypt_p: int = 4
+    # Сжимать текст перед встраиванием (zlib, LZMA — если не хватает емкости); старые отпечатки читаются в любом случае
+    stego_compression: bool = True
+    # Предел размера распакованного текста при чтении отпечатка в байтах (0 — без предела)
+    stego_max_text_bytes: int = 64 * 1024 * 1024
+
+    # Состояния анализа документов (document_id) между правками: бюджет памяти в байтах (0 — не хранить)
+    documents_cache_max_bytes: int = 64 * 1024 * 1024
+
+    # Создание отпечатка из сырого тела (/upload): предел размера текста в байтах (0 — без предела)
+    upload_max_text_bytes: int = 64 * 1024 * 1024
+
+    # Чтение отпечатков: предел размера загрузки в байтах и числа пикселей картинки (0 — без предела)
+    parse_max_upload_bytes: int = 256 * 1024 * 1024
+    parse_max_image_pixels: int = 8000 * 8000
+
+    # PNG: уровень zlib (0-9) и стратегия zlib (-1 по умолчанию, 1 filtered, 2 huffman only, 3 rle, 4 fixed)
+    png_compress_level: int = 6
+    png_compress_type: int = -1
+
+    # Замер длительности этапов: заголовок Server-Timing и гистограммы на /metrics
+    metrics_enabled: bool = False
+
+    # Исполнитель ImprintController для API: "thread" или "process";
+    # workers — число потоков/процессов (по умолчанию по числу ядер), queue_depth — сколько задач может ждать.
+    # У процессов кэши свои: бюджеты render/geometry/documents выше делятся между ними, а не выделяются каждому
+    executor: str = "thread"
+    executor_workers: Optional[int] = None
+    executor_queue_depth: int = 64
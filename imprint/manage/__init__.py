@@ -1 +1 @@
-from . import api  # noqa
+from . import api, bench, render, verify  # noqa
@@ -0,0 +1,78 @@
+import json
+import sys
+from typing import Optional
+
+import click
+
+from .cli import cli
+
+
+def _split(value: Optional[str], cast=str) -> Optional[list]:
+    return [cast(item) for item in value.split(",")] if value else None
+
+
+@cli.command(help="run pipeline benchmarks")
+@click.option("-s", "--stages", default=None, help="Stages, comma separated (default: all)")
+@click.option("-t", "--texts", default=None, help="Text sizes: word,sentence,paragraph,article,book")
+@click.option("-c", "--canvas", default=None, help="Canvas sizes in px, comma separated")
+@click.option("-d", "--drawers", default=None, help="Drawer names, comma separated")
+@click.option("-r", "--repeat", default=3, help="Timed runs per case")
+@click.option("--isolate/--no-isolate", default=True, help="Run each case in a fresh process")
+@click.option("-o", "--output", default=None, type=click.Path(dir_okay=False), help="Write JSON results")
+@click.option("-b", "--baseline", default=None, type=click.Path(exists=True, dir_okay=False), help="Baseline JSON")
+@click.option("--time-threshold", default=0.2, help="Allowed relative time growth vs baseline")
+@click.option("--memory-threshold", default=0.2, help="Allowed relative peak memory growth vs baseline")
+def bench(
+    stages: Optional[str],
+    texts: Optional[str],
+    canvas: Optional[str],
+    drawers: Optional[str],
+    repeat: int,
+    isolate: bool,
+    output: Optional[str],
+    baseline: Optional[str],
+    time_threshold: float,
+    memory_threshold: float,
+) -> None:
+    from ..benchmark.cases import STAGES
+    from ..benchmark.runner import case_key, compare, iter_cases, run
+
+    stage_names = _split(stages)
+    unknown = set(stage_names or []) - set(STAGES)
+    if unknown:
+        raise click.BadParameter(f"unknown stages: {', '.join(sorted(unknown))}", param_hint="--stages")
+
+    cases = list(
+        iter_cases(stage_names, text=_split(texts), canvas=_split(canvas, int), drawer=_split(drawers))
+    )
+
+    def report(result: dict) -> None:
+        key = case_key(result["stage"], result["params"])
+        if "skipped" in result:
+            click.echo(f"{key:<60} skipped: {result['skipped']}")
+        else:
+            click.echo(
+                f"{key:<60} {result['time_min'] * 1000:>10.1f} ms"
+                f" {result['time_median'] * 1000:>10.1f} ms"
+                f" {result['peak_memory'] / 2**20:>8.1f} MB"
+            )
+
+    click.echo(f"{'case':<60} {'min':>13} {'median':>13} {'peak':>11}")
+    results = run(cases, repeat=repeat, isolate=isolate, on_result=report)
+
+    if output:
+        with open(output, "w") as fp:
+            json.dump(results, fp, indent=2, ensure_ascii=False)
+
+    if baseline:
+        with open(baseline) as fp:
+            regressions = compare(results, json.load(fp), time_threshold, memory_threshold)
+
+        for regression in regressions:
+            click.echo(
+                f"REGRESSION {regression['case']} {regression['metric']}: "
+                f"{regression['baseline']:.6g} -> {regression['current']:.6g} ({regression['change']:+.0%})",
+                err=True,
+            )
+        if regressions:
+            sys.exit(1)
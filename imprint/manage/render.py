@@ -0,0 +1,192 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterator, Optional, TextIO
+
+import click
+
+from .cli import cli
+
+_imprint_controller = None
+_image_encoder = None
+
+
+def _init_worker(settings: dict) -> None:
+    from ..core.container import CoreContainer
+
+    global _imprint_controller, _image_encoder
+    controllers = CoreContainer(settings=settings).controllers
+    _imprint_controller = controllers.imprint()
+    _image_encoder = controllers.image_encoder()
+
+
+def _render(item: tuple[str, str, Optional[str], str]) -> tuple[str, Optional[str]]:
+    """Рисует отпечаток и атомарно записывает PNG; возвращает (id, ошибка)."""
+    item_id, text, password, path = item
+    try:
+        image = _imprint_controller.create(text, password)
+
+        # Сначала временный файл в том же каталоге: после сбоя не остается недописанных PNG
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                _image_encoder.save(image, fp)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except Exception as e:
+        return item_id, f"{type(e).__name__}: {e}"
+
+    return item_id, None
+
+
+def _read_items(source: Path, on_error: Callable[[str, str], None]) -> Iterator[tuple[str, str, Optional[str]]]:
+    """
+    (id, текст, пароль): файлы каталога по одному или строки JSONL {"id", "text", "password"}.
+    Нечитаемый файл или строка не прерывает работу: ошибка уходит в on_error(id, ошибка).
+    """
+    if source.is_dir():
+        for path in sorted(path for path in source.rglob("*") if path.is_file()):
+            item_id = str(path.relative_to(source))
+            try:
+                text = path.read_text("utf-8")
+            except (OSError, ValueError) as e:
+                on_error(item_id, f"{type(e).__name__}: {e}")
+                continue
+            yield item_id, text, None
+        return
+
+    # Строки декодируются по одной: битый UTF-8 в одной строке не мешает читать остальные
+    with source.open("rb") as fp:
+        for number, line in enumerate(fp, start=1):
+            try:
+                record = json.loads(line.decode("utf-8")) if line.strip() else None
+                if record is None:
+                    continue
+                if not isinstance(record, dict) or not isinstance(record.get("text"), str):
+                    raise ValueError("expected an object with a string text")
+                if not isinstance(record.get("password"), (str, type(None))):
+                    raise ValueError("password must be a string")
+            except ValueError as e:
+                on_error(str(number), f"line {number}: {type(e).__name__}: {e}")
+                continue
+            yield str(record.get("id", number)), record["text"], record.get("password")
+
+
+def output_path(output: Path, text: str, password: Optional[str] = None) -> Path:
+    """
+    Имя файла — sha256 текста (с паролем — текста и пароля: у разных паролей разные отпечатки);
+    первые два символа — подкаталог, чтобы не держать миллионы файлов в одном.
+    """
+    if password is None:
+        key = text.encode("utf-8")
+    else:
+        key = json.dumps([text, password], ensure_ascii=False).encode("utf-8")
+    digest = hashlib.sha256(key).hexdigest()
+    return output / digest[:2] / f"{digest}.png"
+
+
+class _Progress:
+    """
+    Счетчики, периодический отчет и запись неудачных элементов в --failures.
+    Вход Pool читает в своем потоке: пропуски и ошибки чтения приходят оттуда, поэтому счетчики под блокировкой.
+    """
+
+    def __init__(self, failures_fp: Optional[TextIO], progress_every: float):
+        self.counters = {"rendered": 0, "skipped": 0, "failed": 0}
+        self.failures_fp = failures_fp
+        self.progress_every = progress_every
+        self.started = self.last_report = time.monotonic()
+        self._lock = threading.Lock()
+
+    def skip(self) -> None:
+        with self._lock:
+            self.counters["skipped"] += 1
+
+    def done(self, item_id: str, error: Optional[str]) -> None:
+        if error is None:
+            with self._lock:
+                self.counters["rendered"] += 1
+        else:
+            self.fail(item_id, error)
+
+        if time.monotonic() - self.last_report >= self.progress_every:
+            self.last_report = time.monotonic()
+            self.report()
+
+    def fail(self, item_id: str, error: str) -> None:
+        with self._lock:
+            self.counters["failed"] += 1
+            click.echo(f"failed {item_id}: {error}", err=True)
+            if self.failures_fp is not None:
+                self.failures_fp.write(json.dumps({"id": item_id, "error": error}, ensure_ascii=False) + "\n")
+                self.failures_fp.flush()
+
+    def report(self) -> None:
+        elapsed = time.monotonic() - self.started
+        rendered = self.counters["rendered"]
+        click.echo(
+            f"rendered {rendered}, skipped {self.counters['skipped']}, failed {self.counters['failed']}"
+            f" in {elapsed:.1f}s ({rendered / max(elapsed, 1e-9):.1f} imprints/s)",
+            err=True,
+        )
+
+
+@cli.command(help="render imprints for texts from a directory or JSONL file")
+@click.argument("source", type=click.Path(exists=True, path_type=Path))
+@click.argument("output", type=click.Path(file_okay=False, path_type=Path))
+@click.option("-w", "--workers", default=None, type=int, help="Worker processes (default: CPU count)")
+@click.option("--chunk-size", default=16, help="Items sent to a worker at once")
+@click.option("--failures", default=None, type=click.Path(dir_okay=False), help="Write failed items as JSONL")
+@click.option("--progress-every", default=10.0, help="Progress report interval in seconds")
+def render(
+    source: Path,
+    output: Path,
+    workers: Optional[int],
+    chunk_size: int,
+    failures: Optional[str],
+    progress_every: float,
+) -> None:
+    from ..core.settings import Settings
+
+    workers = workers or os.cpu_count() or 1
+    # Pool читает вход без ограничений: держим в очереди не больше нескольких пачек на воркер
+    in_flight = threading.Semaphore(workers * chunk_size * 4)
+
+    failures_fp = open(failures, "a", encoding="utf-8") if failures else None
+    progress = _Progress(failures_fp, progress_every)
+
+    def pending() -> Iterator[tuple[str, str, Optional[str], str]]:
+        # Уже записанные отпечатки пропускаются: повторный запуск продолжает с места сбоя
+        for item_id, text, password in _read_items(source, on_error=progress.fail):
+            path = output_path(output, text, password)
+            if path.exists():
+                progress.skip()
+                continue
+            in_flight.acquire()
+            yield item_id, text, password, str(path)
+
+    # Тексты почти всегда разные: кэши отрисовки в каждом воркере только заняли бы память
+    settings = Settings(render_cache_max_bytes=0, geometry_cache_max_bytes=0).model_dump()
+
+    context = multiprocessing.get_context("spawn")
+    try:
+        with context.Pool(workers, initializer=_init_worker, initargs=(settings,)) as pool:
+            for item_id, error in pool.imap_unordered(_render, pending(), chunksize=chunk_size):
+                in_flight.release()
+                progress.done(item_id, error)
+    finally:
+        if failures_fp is not None:
+            failures_fp.close()
+
+    progress.report()
+    if progress.counters["failed"]:
+        raise SystemExit(1)
@@ -0,0 +1,86 @@
+import multiprocessing
+import os
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+import click
+from PIL import Image
+
+from .cli import cli
+
+_stego_crypt = None
+
+
+def _init_worker(settings: dict) -> None:
+    from ..core.container import CoreContainer
+
+    global _stego_crypt
+    _stego_crypt = CoreContainer(settings=settings).controllers.stego_crypt()
+
+
+def _verify(item: tuple[str, Optional[str], bool]) -> tuple[str, Optional[str], Optional[tuple[int, int]]]:
+    """Возвращает (путь, ошибка, (флаг, длина нагрузки))."""
+    path, password, read_payload = item
+    try:
+        # PNG открывается лениво: распаковываются только строки с заголовком и нагрузкой
+        with Image.open(path, formats=["PNG"]) as image:
+            header = _stego_crypt.verify(image, password, read_payload=read_payload)
+    except Exception as e:
+        return path, f"{type(e).__name__}: {e}", None
+
+    return path, None, (header.flag, header.data_len)
+
+
+def _iter_png(source: Path) -> Iterator[Path]:
+    for root, _, files in os.walk(source):
+        for name in sorted(files):
+            if name.lower().endswith(".png"):
+                yield Path(root) / name
+
+
+@cli.command(help="check that imprint PNGs in a directory still decode")
+@click.argument("source", type=click.Path(exists=True, file_okay=False, path_type=Path))
+@click.option("-w", "--workers", default=None, type=int, help="Worker processes (default: CPU count)")
+@click.option("-p", "--password", default=None, help="Also decrypt encrypted imprints with this password")
+@click.option("--header-only", is_flag=True, help="Validate headers without reading payloads")
+@click.option("--chunk-size", default=64, help="Files sent to a worker at once")
+def verify(
+    source: Path,
+    workers: Optional[int],
+    password: Optional[str],
+    header_only: bool,
+    chunk_size: int,
+) -> None:
+    from ..core.controllers.stego_crypt.base import FLAG_ENCRYPTED
+    from ..core.settings import Settings
+
+    workers = workers or os.cpu_count() or 1
+    counters = {"ok": 0, "encrypted": 0, "failed": 0, "payload_bytes": 0}
+    started = time.monotonic()
+
+    items = ((str(path), password, not header_only) for path in _iter_png(source))
+
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(workers, initializer=_init_worker, initargs=(Settings().model_dump(),)) as pool:
+        for path, error, header in pool.imap_unordered(_verify, items, chunksize=chunk_size):
+            if error is not None:
+                counters["failed"] += 1
+                click.echo(f"FAILED {path}: {error}")
+                continue
+
+            flag, data_len = header
+            counters["ok"] += 1
+            counters["payload_bytes"] += data_len
+            if flag & FLAG_ENCRYPTED:
+                counters["encrypted"] += 1
+
+    elapsed = time.monotonic() - started
+    total = counters["ok"] + counters["failed"]
+    click.echo(
+        f"checked {total} files in {elapsed:.1f}s ({total / max(elapsed, 1e-9):.1f} files/s): "
+        f"{counters['ok']} ok ({counters['encrypted']} encrypted, {counters['payload_bytes']} payload bytes), "
+        f"{counters['failed']} failed"
+    )
+    if counters["failed"]:
+        raise SystemExit(1)
@@ -1,6 +1,5 @@
 #!/usr/bin/env python3
 from imprint.manage.cli import cli
 
-
 if __name__ == '__main__':
     cli()
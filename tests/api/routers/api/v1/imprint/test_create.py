@@ -1,4 +1,5 @@
 import io
+import zipfile
 
 import pytest
 from PIL import Image
@@ -30,3 +31,115 @@ def test_create_imprint_success(rest_client, text, password):
     assert image.height > 0
 
     image.save("test_output.png")
+
+
+def test_create_imprint_batch(rest_client):
+    items = [
+        {"text": "Hello, world!", "password": None},
+        {"text": "Hello, world!", "password": "test"},
+        {"text": "Goodbye!", "password": None},
+    ]
+    response = rest_client.post("/api/v1/imprint/batch", json={"items": items})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert archive.namelist() == ["0000.png", "0001.png", "0002.png"]
+        for name in archive.namelist():
+            image = Image.open(io.BytesIO(archive.read(name)))
+            assert image.format == "PNG"
+
+
+@pytest.mark.parametrize(["item"], [[{"format": "svg"}], [{"size": 256}], [{"document_id": "doc"}]])
+def test_create_imprint_batch_unsupported(rest_client, item):
+    items = [{"text": "Hello, world!"}, {"text": "Goodbye!", **item}]
+    response = rest_client.post("/api/v1/imprint/batch", json={"items": items})
+
+    assert response.status_code == 400
+
+
+def test_create_imprint_batch_empty(rest_client):
+    response = rest_client.post("/api/v1/imprint/batch", json={"items": []})
+
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize(["password"], [[None], ["test"]])
+def test_upload_imprint(rest_client, password):
+    text = "Привет, мир! " * 1000
+    headers = {"Content-Type": "text/plain; charset=utf-8"}
+    if password:
+        headers["X-Imprint-Password"] = password
+
+    response = rest_client.post("/api/v1/imprint/upload", content=text.encode("utf-8"), headers=headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+
+    files = {"file": ("imprint.png", io.BytesIO(response.content), "image/png")}
+    parse_response = rest_client.post("/api/v1/imprint/parse", files=files, data={"password": password})
+
+    assert parse_response.json()["text"] == text
+
+
+def test_upload_imprint_invalid_encoding(rest_client):
+    response = rest_client.post(
+        "/api/v1/imprint/upload",
+        content=b"\xff\xfe",
+        headers={"Content-Type": "text/plain"},
+    )
+
+    assert response.status_code == 400
+
+
+def test_upload_imprint_too_large(rest_client, api_container):
+    text = "Привет, мир! " * 1000
+    headers = {"Content-Type": "text/plain; charset=utf-8"}
+
+    with api_container.core_container.settings.upload_max_text_bytes.override(len(text.encode("utf-8")) - 1):
+        response = rest_client.post("/api/v1/imprint/upload", content=text.encode("utf-8"), headers=headers)
+        assert response.status_code == 413
+
+        # Без Content-Length предел проверяется по мере чтения тела
+        chunks = iter([text[:500].encode("utf-8"), text[500:].encode("utf-8")])
+        response = rest_client.post("/api/v1/imprint/upload", content=chunks, headers=headers)
+        assert response.status_code == 413
+
+
+def test_create_imprint_svg(rest_client):
+    payload = {"text": "Hello, world!" * 10, "format": "svg"}
+    response = rest_client.post("/api/v1/imprint/", json=payload)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/svg+xml"
+    assert response.text.startswith("<svg")
+
+
+def test_create_imprint_svg_password(rest_client):
+    # SVG не содержит текста: пароль не игнорируется молча, а отклоняется
+    payload = {"text": "Hello, world!", "format": "svg", "password": "test"}
+
+    assert rest_client.post("/api/v1/imprint/", json=payload).status_code == 422
+
+
+def test_create_imprint_preview(rest_client):
+    response = rest_client.post("/api/v1/imprint/", json={"text": "Hello, world!" * 10, "size": 256})
+
+    assert response.status_code == 200
+    assert Image.open(io.BytesIO(response.content)).size == (256, 256)
+
+    response = rest_client.post("/api/v1/imprint/", json={"text": "Hello", "size": 256, "format": "svg"})
+    assert 'width="256"' in response.text
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {"text": "Hello", "size": 256, "password": "test"},
+        {"text": "Hello", "size": 8},
+        {"text": "Hello", "size": 4000},
+    ],
+)
+def test_create_imprint_preview_invalid(rest_client, payload):
+    assert rest_client.post("/api/v1/imprint/", json=payload).status_code == 422
@@ -28,3 +28,44 @@ def test_parse_imprint_success(rest_client, text, password):
     assert parse_response.status_code == 200
     result = parse_response.json()
     assert result["text"] == text
+
+
+@pytest.mark.parametrize("password", [None, "test"])
+def test_parse_imprint_raw(rest_client, password):
+    create_response = rest_client.post("/api/v1/imprint/", json={"text": "Hello, world!", "password": password})
+    headers = {"Content-Type": "image/png"}
+    if password:
+        headers["X-Imprint-Password"] = password
+
+    parse_response = rest_client.post("/api/v1/imprint/parse/raw", content=create_response.content, headers=headers)
+
+    assert parse_response.status_code == 200
+    assert parse_response.json()["text"] == "Hello, world!"
+
+
+def test_parse_imprint_invalid_image(rest_client):
+    files = {"file": ("imprint.png", io.BytesIO(b"not a png"), "image/png")}
+
+    assert rest_client.post("/api/v1/imprint/parse", files=files).status_code == 400
+
+    response = rest_client.post(
+        "/api/v1/imprint/parse/raw",
+        content=b"not a png",
+        headers={"Content-Type": "image/png"},
+    )
+    assert response.status_code == 400
+
+
+def test_parse_imprint_upload_too_large(rest_client, api_container):
+    image_bytes = rest_client.post("/api/v1/imprint/", json={"text": "Hello, world!"}).content
+
+    with api_container.core_container.settings.parse_max_upload_bytes.override(len(image_bytes) - 1):
+        files = {"file": ("imprint.png", io.BytesIO(image_bytes), "image/png")}
+        assert rest_client.post("/api/v1/imprint/parse", files=files).status_code == 413
+
+        response = rest_client.post(
+            "/api/v1/imprint/parse/raw",
+            content=iter([image_bytes]),
+            headers={"Content-Type": "image/png"},
+        )
+        assert response.status_code == 413
@@ -0,0 +1,37 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from imprint.api.app import create_app
+from imprint.api.container import ApiContainer
+from imprint.core.container import CoreContainer
+from imprint.core.settings import Settings
+
+
+@pytest.fixture
+def metrics_client():
+    settings = Settings(metrics_enabled=True, render_cache_max_bytes=0, geometry_cache_max_bytes=0).model_dump()
+    container = ApiContainer(settings={"core": settings}, core_container=CoreContainer(settings=settings))
+
+    with TestClient(create_app(container)) as client:
+        yield client
+
+
+def test_server_timing_and_metrics(metrics_client):
+    response = metrics_client.post("/api/v1/imprint/", json={"text": "Hello, world!", "password": "test"})
+
+    assert response.status_code == 200
+    server_timing = response.headers["Server-Timing"]
+    for name in ("analyze", "drawer.crystal", "rasterize", "composite", "kdf", "lsb_embed"):
+        assert f"{name};dur=" in server_timing
+
+    text = metrics_client.get("/metrics").text
+
+    assert 'imprint_stage_seconds_count{canvas="1000",drawer="crystal",stage="drawer"} 1' in text
+    assert 'imprint_stage_seconds_count{canvas="1000",stage="png_encode"} 1' in text
+
+
+def test_metrics_disabled(rest_client):
+    assert rest_client.get("/metrics").status_code == 404
+
+    response = rest_client.post("/api/v1/imprint/", json={"text": "Hello, world!"})
+    assert "Server-Timing" not in response.headers
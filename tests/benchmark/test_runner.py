@@ -0,0 +1,24 @@
+from imprint.benchmark.runner import compare, iter_cases, run
+
+
+def test_iter_cases_filters():
+    cases = list(iter_cases(["drawer", "imprint.create"], text=["word"], canvas=[1000], drawer=["crystal"]))
+
+    assert cases == [
+        ("drawer", {"drawer": "crystal", "text": "word", "canvas": 1000}),
+        ("imprint.create", {"text": "word"}),
+    ]
+
+
+def test_run_and_compare():
+    cases = iter_cases(["text_analyzer.analyze", "stego_crypt.decode"], text=["word"], canvas=[1000])
+    results = run(cases, repeat=1, isolate=False)
+
+    assert [result["stage"] for result in results["results"]] == ["text_analyzer.analyze", "stego_crypt.decode"]
+    assert all(result["time_min"] > 0 for result in results["results"])
+    assert compare(results, results) == []
+
+    baseline = {"results": [dict(result, time_min=result["time_min"] / 2) for result in results["results"]]}
+    regressions = compare(results, baseline, time_threshold=0.5)
+
+    assert [regression["metric"] for regression in regressions] == ["time_min", "time_min"]
@@ -0,0 +1,113 @@
+import io
+from xml.etree import ElementTree
+
+from PIL import Image, ImageDraw
+
+from imprint.core.controllers.graphic_engine.base import GraphicEngineController
+from imprint.core.controllers.graphic_engine.cache import GeometryCache
+from imprint.core.controllers.graphic_engine.display_list import DisplayList
+from imprint.core.controllers.graphic_engine.drawers.base import DrawSettings
+from imprint.core.controllers.graphic_engine.drawers.genesis import GenesisDrawer
+from imprint.core.controllers.graphic_engine.drawers.kaleidoscope import (
+    KaleidoscopeDrawer,
+)
+from imprint.core.controllers.graphic_engine.svg import to_svg
+from imprint.core.controllers.imprint import ImprintController
+
+draw_settings = DrawSettings(
+    hash="0123456789abcdef0123456789abcdef",
+    canvas_size=1000,
+    symbols_count=1000,
+    chars_stats=[("a", 600), ("b", 400)],
+)
+
+
+def test_primitives():
+    display_list = DisplayList(100)
+    display_list.polyline([(0, 0), (10, 10), (20, 0)], (1, 2, 3, 4), 2.0, joint="curve")
+    display_list.ellipse([40, 40, 60, 60], (5, 6, 7, 8))
+
+    kinds, offsets, points, colors, widths, joints = display_list.arrays
+
+    assert len(display_list) == 2
+    assert kinds.tolist() == [0, 1]
+    assert offsets.tolist() == [0, 3, 5]
+    assert colors.tolist() == [[1, 2, 3, 4], [5, 6, 7, 8]]
+    assert widths.tolist() == [2.0, 0.0]
+    assert joints.tolist() == [1, 0]
+
+
+def test_build_rasterize_matches_draw():
+    engine = GraphicEngineController()
+
+    display_list = engine.build(draw_settings)
+
+    assert engine.rasterize(display_list).tobytes() == engine.draw(draw_settings).tobytes()
+
+
+def test_save_load():
+    engine = GraphicEngineController()
+    display_list = engine.build(draw_settings, drawers=[GenesisDrawer(), KaleidoscopeDrawer()])
+
+    buffer = io.BytesIO()
+    display_list.save(buffer)
+    buffer.seek(0)
+    loaded = DisplayList.load(buffer)
+
+    assert loaded.canvas_size == display_list.canvas_size
+    assert engine.rasterize(loaded).tobytes() == engine.rasterize(display_list).tobytes()
+
+
+def test_rasterize_other_size():
+    display_list = DisplayList(100)
+    display_list.polyline([(10, 50), (90, 50)], (255, 0, 0, 255), 10.0)
+
+    image = Image.new("RGBA", (200, 200), (0, 0, 0, 0))
+    display_list.rasterize(ImageDraw.Draw(image), 200)
+
+    # Координаты удваиваются, толщина считается от нового размера холста
+    assert image.getbbox() == (20, 100, 181, 102)
+
+
+def test_geometry_cache(controllers, tmp_path):
+    geometry_cache = GeometryCache(max_bytes=16 * 1024 * 1024, cache_dir=str(tmp_path))
+    imprint_controller = ImprintController(
+        text_analyzer_controller=controllers.text_analyzer(),
+        graphic_engine_controller=controllers.graphic_engine(),
+        stego_crypt_controller=controllers.stego_crypt(),
+        geometry_cache=geometry_cache,
+    )
+
+    first = imprint_controller.render(draw_settings)
+    second = imprint_controller.render(draw_settings)
+
+    assert geometry_cache.stats()["hits"] == 1
+    assert first.tobytes() == second.tobytes()
+
+    # Второй экземпляр находит геометрию на диске
+    cache = GeometryCache(max_bytes=16 * 1024 * 1024, cache_dir=str(tmp_path))
+    key = cache.make_key(draw_settings, controllers.graphic_engine().default_drawers)
+
+    assert len(cache.get(key)) == len(geometry_cache.get(key))
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_svg():
+    display_list = DisplayList(100)
+    display_list.polylines([[(0, 0), (10.4, 10.6)], [(50, 50), (50.2, 50.2)]], (255, 0, 0, 255), 20.0)
+    display_list.polyline([(0, 0), (20, 0), (20, 0)], (0, 0, 255, 128), 20.0, joint="curve")
+    display_list.ellipse([40, 40, 60, 60], (0, 255, 0, 255))
+
+    root = ElementTree.fromstring(to_svg(display_list))
+    elements = list(root)
+
+    assert root.get("viewBox") == "0 0 100 100"
+    assert [element.tag.split("}")[1] for element in elements] == ["rect", "path", "path", "ellipse"]
+    # Ломаные одного стиля слиты в один path, координаты квантованы до пикселя
+    assert elements[1].get("d") == "M0 0l10 11M50 50"
+    assert elements[1].get("stroke") == "#ff0000"
+    assert elements[1].get("stroke-width") == "2"
+    assert elements[2].get("d") == "M0 0l20 0"
+    assert elements[2].get("stroke-opacity") == "0.502"
+    assert elements[2].get("stroke-linejoin") == "round"
+    assert (elements[3].get("cx"), elements[3].get("rx")) == ("50", "10")
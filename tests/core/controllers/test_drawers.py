@@ -0,0 +1,220 @@
+import math
+import random
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+from imprint.core.controllers.graphic_engine.base import GraphicEngineController
+from imprint.core.controllers.graphic_engine.drawers.base import (
+    DrawerBase,
+    DrawSettings,
+)
+from imprint.core.controllers.graphic_engine.drawers.crystal import CrystalDrawer
+from imprint.core.controllers.graphic_engine.drawers.flow import FlowDrawer
+from imprint.core.controllers.graphic_engine.drawers.genesis import GenesisDrawer
+from imprint.core.controllers.graphic_engine.drawers.kaleidoscope import (
+    KaleidoscopeDrawer,
+)
+
+draw_settings = DrawSettings(
+    hash="0123456789abcdef0123456789abcdef",
+    canvas_size=1000,
+    symbols_count=1000,
+    chars_stats=[("a", 600), ("b", 400)],
+)
+
+
+def render(drawer: DrawerBase) -> Image.Image:
+    image = Image.new("RGBA", (draw_settings.canvas_size,) * 2, (0, 0, 0, 0))
+    drawer.draw(ImageDraw.Draw(image), draw_settings)
+    return image
+
+
+def test_rotate_sectors():
+    points = np.array([[10.0, 0.0], [3.0, 4.0]])
+
+    rotated = DrawerBase.rotate_sectors(points, 4, (100, 100))
+
+    assert rotated.shape == (4, 2, 2)
+    for i in range(4):
+        a = i * 2 * math.pi / 4
+        for (px, py), (rx, ry) in zip(points, rotated[i], strict=True):
+            assert rx == px * math.cos(a) - py * math.sin(a) + 100
+            assert ry == px * math.sin(a) + py * math.cos(a) + 100
+
+
+def test_flow_smooth_matches_pointwise():
+    rotated = np.random.default_rng(0).uniform(0, 1000, (3, 20, 2))
+
+    smoothed = FlowDrawer._smooth(rotated)
+
+    for sector, points in zip(smoothed, rotated, strict=True):
+        expected = [tuple(points[0])]
+        for j in range(1, len(points) - 1):
+            p0, p1 = points[j], points[j + 1]
+            mid_x, mid_y = (p0[0] + p1[0]) / 2, (p0[1] + p1[1]) / 2
+            for t_step in range(1, 5):
+                t = t_step / 4
+                last_p = expected[-1]
+                expected.append(
+                    (
+                        (1 - t) ** 2 * last_p[0] + 2 * (1 - t) * t * p0[0] + t**2 * mid_x,
+                        (1 - t) ** 2 * last_p[1] + 2 * (1 - t) * t * p0[1] + t**2 * mid_y,
+                    )
+                )
+
+        assert [tuple(p) for p in sector] == expected
+
+
+@pytest.mark.parametrize(["compat"], [[True], [False]])
+def test_flow_deterministic(compat):
+    first = render(FlowDrawer(compat=compat))
+    second = render(FlowDrawer(compat=compat))
+
+    assert first.getbbox() is not None
+    assert first.tobytes() == second.tobytes()
+
+
+def test_genesis_segments_match_pointwise():
+    rotated = np.random.default_rng(0).uniform(0, 1000, (2, 10, 2))
+
+    points = GenesisDrawer._segment_points(rotated)
+
+    for sector, path in zip(points, rotated, strict=True):
+        segments = []
+        for j in range(1, len(path) - 1):
+            p0, p1, p2 = path[j - 1], path[j], path[j + 1]
+            m1, m2 = (p0 + p1) / 2, (p1 + p2) / 2
+            for t_idx in range(4):
+                t, t_n = t_idx / 4, (t_idx + 1) / 4
+                segments.append(((1 - t) * m1 + t * m2, (1 - t_n) * m1 + t_n * m2))
+
+        for (ps, pe), start, end in zip(segments, sector[:-1], sector[1:], strict=True):
+            assert np.allclose(ps, start) and np.allclose(pe, end)
+
+
+def test_genesis_palette():
+    palette = GenesisDrawer(palette_size=8)._palette(120)
+
+    assert len(palette) == 8
+    assert palette[0][3] == 255
+    assert palette[-1][3] == int(255 * (1.0 - 0.8))
+
+
+def test_genesis_palette_quantization():
+    def render_genesis(palette_size: int) -> np.ndarray:
+        image = Image.new("RGBA", (draw_settings.canvas_size,) * 2, (255, 255, 255, 255))
+        GenesisDrawer(palette_size=palette_size).draw(ImageDraw.Draw(image), draw_settings)
+        return np.asarray(image.convert("RGB")).astype(int)
+
+    # Очень мелкая палитра — тот же цвет, что при расчете для каждого отрезка
+    difference = np.abs(render_genesis(64) - render_genesis(1_000_000))
+
+    assert 0 < difference.max() <= 3
+
+
+def test_kaleidoscope_walk_bounces_back():
+    limit = 30
+    path = KaleidoscopeDrawer(density=200)._walk(seed=1, start=20, step_dist=9, limit=limit)
+
+    distances = np.hypot(path[:, 0], path[:, 1])
+    outside = np.flatnonzero(distances > limit)
+
+    assert outside.size
+    for idx in outside:
+        # Шаг наружу рисуется, затем точка возвращается туда, откуда вышла
+        assert (path[idx + 1] == path[idx - 1]).all()
+
+
+def test_crystal_random_matches_python():
+    expected = random.Random(42)
+
+    samples = CrystalDrawer._random(42).random_sample(10)
+
+    assert samples.tolist() == [expected.random() for _ in range(10)]
+
+
+def test_crystal_ray_budget():
+    chars_stats = [(chr(0x4E00 + i), 1) for i in range(5000)]
+    settings = DrawSettings(
+        hash=draw_settings.hash,
+        canvas_size=1000,
+        symbols_count=len(chars_stats),
+        chars_stats=chars_stats,
+    )
+    lines = []
+
+    class Canvas:
+        def line(self, xy, **kwargs):
+            lines.append(xy)
+
+    CrystalDrawer(max_rays=1000).draw(Canvas(), settings)
+
+    assert 0 < len(lines) <= 1000
+
+
+def test_crystal_under_budget_matches_pointwise():
+    # Редкие символы с коротким лучом: много лучей заканчивается в одном пикселе
+    settings = DrawSettings(
+        hash=draw_settings.hash,
+        canvas_size=1000,
+        symbols_count=1000,
+        chars_stats=[("a", 600), ("b", 300)] + [(chr(0x430 + i), 5) for i in range(20)],
+    )
+    drawer = CrystalDrawer()
+
+    actual = Image.new("RGBA", (1000, 1000), (0, 0, 0, 0))
+    drawer.draw(ImageDraw.Draw(actual), settings)
+
+    # Исходный цикл: каждый луч рисуется отдельно
+    expected = Image.new("RGBA", (1000, 1000), (0, 0, 0, 0))
+    canvas = ImageDraw.Draw(expected)
+    base_hue = drawer.get_base_hue(settings)
+    line_width = max(1, int(drawer.line_width * settings.scale_factor))
+    rng = random.Random(settings.seed)
+    current_angle = 0.0
+    num_rays = int(60 * (1 + 0.3 * math.log10(settings.symbols_count)))
+    for i, (_, count) in enumerate(settings.chars_stats):
+        percentage = count / settings.symbols_count
+        angle_sweep = percentage * 360
+        fill = (*drawer.get_rgb_base_color(base_hue, 40 + i % 20, 90), drawer.alpha)
+        radius = min(425 * percentage * 10, 425)
+        for _ in range(num_rays):
+            rad_angle = math.radians(rng.uniform(current_angle, current_angle + angle_sweep))
+            length = radius * rng.uniform(0.7, 1.1)
+            x_end, y_end = 500 + math.cos(rad_angle) * length, 500 + math.sin(rad_angle) * length
+            canvas.line([(500, 500), (x_end, y_end)], fill=fill, width=line_width)
+        current_angle += angle_sweep
+
+    assert actual.tobytes() == expected.tobytes()
+
+
+def test_engine_composite_matches_alpha_composite():
+    drawers = [CrystalDrawer(), FlowDrawer()]
+    overlay = Image.new("RGBA", (draw_settings.canvas_size,) * 2, (0, 0, 0, 0))
+    canvas = ImageDraw.Draw(overlay)
+    for drawer in drawers:
+        drawer.draw(canvas, draw_settings)
+    white = Image.new("RGBA", overlay.size, (255, 255, 255, 255))
+    expected = Image.alpha_composite(white, overlay).convert("RGB")
+
+    engine = GraphicEngineController()
+    # Второй вызов рисует в переиспользованном слое: он должен быть очищен
+    engine.draw(draw_settings, drawers=[KaleidoscopeDrawer()])
+    image = engine.draw(draw_settings, drawers=drawers)
+
+    assert image.mode == "RGB"
+    assert image.tobytes() == expected.tobytes()
+
+
+def test_draw_settings_precomputed():
+    assert draw_settings.bytes_list == (0x01, 0x23, 0x45, 0x67, 0x89, 0xAB, 0xCD, 0xEF) * 2
+    assert draw_settings.seed == int(draw_settings.hash, 16) % (2**32)
+    assert draw_settings.base_hue == sum(draw_settings.bytes_list[::4]) % 360
+    assert draw_settings.chars_stats == [("a", 600), ("b", 400)]
+
+    with pytest.raises(AttributeError):
+        draw_settings.canvas_size = 2000
+    with pytest.raises(ValueError):
+        draw_settings.counts[0] = 1
@@ -0,0 +1,156 @@
+import asyncio
+import io
+import threading
+
+import pytest
+
+from imprint.core.controllers.executor.base import (
+    ExecutorSaturatedError,
+    ThreadExecutor,
+)
+from imprint.core.controllers.executor.process import ProcessExecutor
+
+
+class BlockingImprintController:
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def create(self, text, password=None, document_id=None):
+        self.started.set()
+        self.release.wait(timeout=5)
+        return text
+
+
+async def test_thread_executor_saturated():
+    imprint_controller = BlockingImprintController()
+    executor = ThreadExecutor(imprint_controller, workers=1, queue_depth=0)
+
+    task = asyncio.create_task(executor.create("first"))
+    await asyncio.to_thread(imprint_controller.started.wait, 5)
+
+    with pytest.raises(ExecutorSaturatedError):
+        await executor.create("second")
+
+    imprint_controller.release.set()
+    assert await task == "first"
+    assert await executor.create("third") == "third"
+
+
+async def test_thread_executor_create_from_stream():
+    class StreamImprintController:
+        def create_from_stream(self, chunks, password=None):
+            return b"".join(chunks)
+
+        def create(self, text, password=None, document_id=None):
+            return text
+
+    executor = ThreadExecutor(StreamImprintController(), workers=1, queue_depth=1)
+    uploaded = asyncio.Event()
+
+    async def body():
+        yield b"first "
+        await uploaded.wait()
+        yield b"second"
+
+    stream = asyncio.create_task(executor.create_from_stream(body()))
+    await asyncio.sleep(0)
+
+    # Пока клиент досылает тело, единственный поток пула свободен для других запросов
+    assert await asyncio.wait_for(executor.create("other"), timeout=5) == "other"
+
+    uploaded.set()
+    assert await stream == b"first second"
+    assert executor.limiter.borrowed_tokens == 0
+
+
+async def test_thread_executor_create_many():
+    threads = set()
+
+    class BatchImprintController:
+        def create_many(self, texts, passwords=None, map_func=None):
+            return map_func(lambda text: threads.add(threading.get_ident()) or text.upper(), texts)
+
+    executor = ThreadExecutor(BatchImprintController(), workers=2, queue_depth=1)
+
+    # Этапы пакета идут через общий limiter, а не через собственный пул
+    assert await executor.create_many(["a", "b", "c"]) == ["A", "B", "C"]
+    assert len(threads) <= 2
+    assert executor.limiter.borrowed_tokens == 0
+
+    # Слот на каждые workers текстов: 7 текстов — 4 слота, а всего их 3
+    with pytest.raises(ExecutorSaturatedError):
+        await executor.create_many(list("abcdefg"))
+    assert await executor.create_many(list("abcdef")) == list("ABCDEF")
+
+
+async def test_process_executor(core_settings):
+    executor = ProcessExecutor(settings=core_settings, workers=1)
+    await executor.start()
+    try:
+        image = await executor.create("Hello, world!", "test")
+
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+
+        buffer.seek(0)
+
+        assert await executor.parse(buffer, "test") == "Hello, world!"
+
+        async def body():
+            yield "Hello, ".encode("utf-8")
+            yield "world!".encode("utf-8")
+
+        streamed = await executor.create_from_stream(body(), "test")
+        assert streamed.size == image.size
+
+        images = await executor.create_many(["first", "second", "first"], [None, "test", "test"])
+
+        assert [image.size for image in images] == [image.size] * 3
+    finally:
+        await executor.shutdown()
+
+
+async def test_process_executor_saturated_does_not_read(core_settings):
+    executor = ProcessExecutor(settings=core_settings, workers=1, queue_depth=0)
+    await executor.start()
+    try:
+        executor._acquire()
+
+        async def body():
+            raise AssertionError("тело читается при заполненной очереди")
+            yield b""
+
+        buffer = io.BytesIO(b"png")
+
+        # Слот занимается до чтения загрузки, поэтому отказ не стоит ни памяти, ни диска
+        with pytest.raises(ExecutorSaturatedError):
+            await executor.parse(buffer)
+        with pytest.raises(ExecutorSaturatedError):
+            await executor.create_from_stream(body())
+        assert buffer.tell() == 0
+    finally:
+        executor._release()
+        await executor.shutdown()
+
+
+def test_process_executor_cache_budgets(core_settings):
+    settings = {**core_settings, "render_cache_max_bytes": 1000, "geometry_cache_max_bytes": 0}
+
+    executor = ProcessExecutor(settings=settings, workers=4)
+
+    # Общий бюджет делится между воркерами, выключенный кэш остается выключенным
+    assert executor.settings["render_cache_max_bytes"] == 250
+    assert executor.settings["geometry_cache_max_bytes"] == 0
+    assert executor.settings["documents_cache_max_bytes"] == core_settings["documents_cache_max_bytes"] // 4
+
+
+async def test_process_executor_create_many_two_workers(core_settings):
+    executor = ProcessExecutor(settings=core_settings, workers=2)
+    try:
+        images = await executor.create_many(["first", "second", "third"])
+
+        assert len(images) == 3
+        assert images[0].tobytes() != images[1].tobytes()
+    finally:
+        await executor.shutdown()
@@ -0,0 +1,47 @@
+import io
+import os
+import threading
+
+import pytest
+from PIL import Image
+
+from imprint.core.controllers.image_encoder.base import ImageEncoderController
+
+
+@pytest.mark.parametrize(["compress_level"], [[0], [1], [9]])
+def test_iter_png(compress_level):
+    image_encoder = ImageEncoderController(compress_level=compress_level, chunk_size=1024)
+    image = Image.frombytes("RGB", (300, 200), os.urandom(300 * 200 * 3))
+
+    chunks = list(image_encoder.iter_png(image))
+
+    assert len(chunks) > 1
+    decoded = Image.open(io.BytesIO(b"".join(chunks)))
+    assert decoded.format == "PNG"
+    assert decoded.tobytes() == image.tobytes()
+
+
+def test_iter_write_error():
+    def write(fp):
+        fp.write(b"data")
+        raise OSError("broken")
+
+    with pytest.raises(OSError):
+        list(ImageEncoderController().iter_write(write))
+
+
+def test_iter_write_cancel():
+    finished = threading.Event()
+
+    def write(fp):
+        try:
+            while True:
+                fp.write(b"x" * 1024)
+        finally:
+            finished.set()
+
+    chunks = ImageEncoderController(chunk_size=1024, max_pending_chunks=1).iter_write(write)
+    next(chunks)
+    chunks.close()
+
+    assert finished.wait(timeout=5)
@@ -1,3 +1,5 @@
+import io
+
 import pytest
 
 from imprint.core.controllers.graphic_engine.drawers.core import CoreDrawer
@@ -7,6 +9,7 @@ from imprint.core.controllers.graphic_engine.drawers.genesis import GenesisDrawe
 from imprint.core.controllers.graphic_engine.drawers.kaleidoscope import (
     KaleidoscopeDrawer,
 )
+from imprint.core.controllers.imprint import ImageTooLargeError, ImprintController
 
 crystal_drawer = CrystalDrawer(color="red")
 core_drawer = CoreDrawer(color="red")
@@ -55,3 +58,94 @@ def test_drawers_with_text(
 
         file_name = f"{text[:50]}___{'_'.join([d.name for d in drawers])}.png"
         image.convert("RGB").save(file_name, "PNG")
+
+
+def test_create_many(imprint_controller):
+    texts = ["Привет!", "Пока", "Привет!"]
+    passwords = [None, "test", "test"]
+
+    images = imprint_controller.create_many(texts, passwords)
+
+    assert len(images) == 3
+    assert images[0].tobytes() != images[2].tobytes()
+    for image, text, password in zip(images, texts, passwords, strict=True):
+        assert imprint_controller.parse(image, password) == text
+
+
+def test_create_many_length_mismatch(imprint_controller):
+    with pytest.raises(ValueError):
+        imprint_controller.create_many(["Привет!"], [None, None])
+
+
+def test_create_from_stream(imprint_controller):
+    text = "Привет! Как дела? " * 100
+    data = text.encode("utf-8")
+    # Куски режут многобайтовые символы и слова посередине
+    chunks = [data[i : i + 7] for i in range(0, len(data), 7)]
+
+    image = imprint_controller.create_from_stream(chunks)
+
+    assert image.tobytes() == imprint_controller.create(text).tobytes()
+    assert imprint_controller.parse(image) == text
+
+
+def test_parse_file_max_pixels(imprint_controller):
+    buffer = io.BytesIO()
+    imprint_controller.create("Hello, world!", "test").save(buffer, format="PNG")
+    buffer.seek(0)
+
+    assert imprint_controller.parse_file(buffer, "test") == "Hello, world!"
+
+    limited = ImprintController(
+        imprint_controller.text_analyzer_controller,
+        imprint_controller.graphic_engine_controller,
+        imprint_controller.stego_crypt_controller,
+        max_image_pixels=1000 * 1000 - 1,
+    )
+    buffer.seek(0)
+    with pytest.raises(ImageTooLargeError):
+        limited.parse_file(buffer, "test")
+
+
+def test_create_preview(imprint_controller):
+    text = "Hello, world!" * 100
+    preview = imprint_controller.create_preview(text, 250)
+
+    assert preview.size == (250, 250)
+    assert preview.getextrema() != ((255, 255),) * 3
+
+    # Та же геометрия, что у полноразмерного отпечатка, растеризованная сразу в 250px
+    metrics = imprint_controller.text_analyzer_controller.analyze(text)
+    draw_settings = imprint_controller._draw_settings(metrics)
+    expected = imprint_controller.graphic_engine_controller.draw(draw_settings, canvas_size=250)
+
+    assert draw_settings.canvas_size > 250
+    assert preview.tobytes() == expected.tobytes()
+
+
+def test_create_document_appended(imprint_controller):
+    text = "Hello, world! " * 50
+    imprint_controller.create(text, document_id="doc")
+
+    appended = text + "And a few more words."
+    image = imprint_controller.create(appended, document_id="doc")
+
+    assert imprint_controller.documents.get("doc").length == len(appended)
+    assert image.tobytes() == imprint_controller.create(appended).tobytes()
+
+
+def test_documents_cache_budget_in_bytes(imprint_controller):
+    limited = ImprintController(
+        imprint_controller.text_analyzer_controller,
+        imprint_controller.graphic_engine_controller,
+        imprint_controller.stego_crypt_controller,
+        documents_cache_max_bytes=64 * 1024,
+    )
+
+    limited.create("Hello, world! " * 50, document_id="short")
+    assert limited.documents.get("short").nbytes < limited.documents.max_bytes
+
+    # Текст без пробелов целиком лежит в хвосте состояния и в бюджет не помещается
+    limited.create("x" * 100_000, document_id="long")
+    assert limited.documents.get("long") is None
+    assert limited.documents.current_bytes <= limited.documents.max_bytes
@@ -0,0 +1,65 @@
+from PIL import Image
+
+from imprint.core.controllers.graphic_engine.cache import RenderCache
+from imprint.core.controllers.graphic_engine.drawers.base import DrawSettings
+from imprint.core.controllers.graphic_engine.drawers.core import CoreDrawer
+from imprint.core.controllers.imprint import ImprintController
+
+draw_settings = DrawSettings(
+    hash="abcdef",
+    canvas_size=1000,
+    symbols_count=3,
+    chars_stats=[("a", 1), ("b", 1), ("c", 1)],
+)
+
+
+def test_memory_budget():
+    cache = RenderCache(max_bytes=2 * 10 * 10 * 4)
+
+    for key in ["a", "b", "c"]:
+        cache.put(key, Image.new("RGBA", (10, 10)))
+
+    assert cache.get("a") is None
+    assert cache.get("b") is not None
+    assert cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] == 2 * 10 * 10 * 4
+
+
+def test_key_depends_on_drawers():
+    key = RenderCache.make_key(draw_settings, [CoreDrawer(color="red")])
+
+    assert key == RenderCache.make_key(draw_settings, [CoreDrawer(color="red")])
+    assert key != RenderCache.make_key(draw_settings, [CoreDrawer(color="blue")])
+    assert key != RenderCache.make_key(
+        draw_settings.replace(canvas_size=2000),
+        [CoreDrawer(color="red")],
+    )
+
+
+def test_disk_tier(tmp_path):
+    image = Image.new("RGBA", (10, 10), (1, 2, 3, 255))
+    RenderCache(max_bytes=1024, cache_dir=str(tmp_path)).put("key", image)
+
+    cache = RenderCache(max_bytes=1024, cache_dir=str(tmp_path))
+
+    assert cache.get("key").tobytes() == image.tobytes()
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_create_uses_cache(controllers):
+    render_cache = RenderCache(max_bytes=64 * 1024 * 1024)
+    imprint_controller = ImprintController(
+        text_analyzer_controller=controllers.text_analyzer(),
+        graphic_engine_controller=controllers.graphic_engine(),
+        stego_crypt_controller=controllers.stego_crypt(),
+        render_cache=render_cache,
+    )
+
+    first = imprint_controller.create("Hello, world!")
+    second = imprint_controller.create("Hello, world!", password="test")
+
+    assert render_cache.stats()["hits"] == 1
+    assert render_cache.stats()["misses"] == 1
+    assert first.size == second.size
+    assert imprint_controller.parse(second, "test") == "Hello, world!"
@@ -0,0 +1,236 @@
+import base64
+import io
+import os
+import random
+
+import pytest
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from PIL import Image
+
+from imprint.core.controllers.stego_crypt import lsb
+from imprint.core.controllers.stego_crypt.base import StegoCryptController
+
+
+@pytest.fixture
+def base_image():
+    image = Image.new("RGBA", (64, 48))
+    image.putdata([(i % 256, (i * 7) % 256, (i * 13) % 256, 255) for i in range(64 * 48)])
+    return image
+
+
+@pytest.mark.parametrize(
+    ["text", "password"],
+    [
+        ["", None],
+        ["Hello, world!", None],
+        ["Привет! Как дела?" * 10, None],
+        ["Hello, world!", "test_password"],
+    ],
+)
+def test_encode_decode(base_image, text, password):
+    stego_crypt = StegoCryptController()
+
+    stego_image = stego_crypt.encode(base_image, text, password)
+
+    assert stego_image.mode == "RGB"
+    assert stego_image.size == base_image.size
+    assert stego_crypt.decode(stego_image, password) == text
+
+
+def test_encode_format(base_image):
+    stego_crypt = StegoCryptController()
+    text = "Hello, world!"
+
+    stego_image = stego_crypt.encode(base_image, text)
+
+    data = stego_crypt.prepare_data(text)
+    bits = [int(bit) for byte in data for bit in f"{byte:08b}"]
+    channels = list(stego_image.tobytes())
+
+    assert [channel & 1 for channel in channels[: len(bits)]] == bits
+    # Все остальные пиксели остаются нетронутыми
+    original = list(base_image.convert("RGB").tobytes())
+    assert channels[len(bits) :] == original[len(bits) :]
+
+
+def test_encode_too_much_data(base_image):
+    stego_crypt = StegoCryptController()
+
+    # Случайный текст почти не сжимается
+    text = base64.b64encode(os.urandom(2000)).decode()
+
+    with pytest.raises(ValueError):
+        stego_crypt.encode(base_image, text)
+
+
+def test_decode_lazy_png(base_image):
+    stego_crypt = StegoCryptController()
+    text = "Hello, world!"
+
+    buffer = io.BytesIO()
+    stego_crypt.encode(base_image, text).save(buffer, format="PNG")
+    buffer.seek(0)
+
+    image = Image.open(buffer)
+
+    assert stego_crypt.decode(image) == text
+    # Холст целиком так и не был распакован
+    assert image.tile
+
+
+def test_encode_in_place():
+    stego_crypt = StegoCryptController()
+    image = Image.new("RGB", (100, 100), (255, 255, 255))
+
+    encoded = stego_crypt.encode(image, "Hello, world!", in_place=True)
+
+    assert encoded is image
+    assert stego_crypt.decode(image) == "Hello, world!"
+
+
+def test_decode_legacy_encrypted(base_image):
+    stego_crypt = StegoCryptController()
+    salt = b"\x01" * 16
+
+    # Старый формат: флаг 0x01 без блока KDF, PBKDF2 со 100 000 итераций
+    key = stego_crypt._generate_key("test", salt)
+    encrypted_data = Fernet(key).encrypt("Hello, world!".encode("utf-8"))
+    data = b"\x01" + len(encrypted_data).to_bytes(4, "big") + salt + encrypted_data
+
+    image = lsb.embed(base_image, data)
+
+    assert StegoCryptController().decode(image, "test") == "Hello, world!"
+
+
+@pytest.mark.parametrize(
+    ["kwargs"],
+    [
+        [{"kdf_iterations": 1000}],
+        [{"kdf_algorithm": "scrypt", "kdf_scrypt_n": 2**10, "kdf_scrypt_r": 4, "kdf_scrypt_p": 2}],
+    ],
+)
+def test_kdf_params_stored(base_image, kwargs):
+    stego_image = StegoCryptController(**kwargs).encode(base_image, "Hello, world!", "test")
+
+    # Читатель с настройками по умолчанию берет алгоритм и стоимость из блока KDF
+    assert StegoCryptController().decode(stego_image, "test") == "Hello, world!"
+
+
+def test_key_cache(base_image, monkeypatch):
+    stego_crypt = StegoCryptController(kdf_iterations=1000)
+    stego_image = stego_crypt.encode(base_image, "Hello, world!", "test")
+
+    calls = []
+    derive = PBKDF2HMAC.derive
+    monkeypatch.setattr(PBKDF2HMAC, "derive", lambda self, data: calls.append(data) or derive(self, data))
+
+    reader = StegoCryptController(kdf_iterations=1000)
+    for _ in range(3):
+        assert reader.decode(stego_image, "test") == "Hello, world!"
+
+    assert len(calls) == 1
+
+
+def test_key_cache_encode(base_image):
+    stego_crypt = StegoCryptController(kdf_iterations=1000)
+    for _ in range(3):
+        stego_crypt.encode(base_image, "Hello, world!", "test")
+
+    # Ключи для случайных солей новых отпечатков в кэш не попадают
+    assert len(stego_crypt._keys) == 0
+
+
+@pytest.mark.parametrize(
+    ["kwargs", "limits"],
+    [
+        [{"kdf_iterations": 200000}, {"kdf_max_iterations": 100000}],
+        [{"kdf_algorithm": "scrypt", "kdf_scrypt_n": 2**12}, {"kdf_max_scrypt_n": 2**11}],
+        [{"kdf_algorithm": "scrypt", "kdf_scrypt_n": 2**10, "kdf_scrypt_r": 4}, {"kdf_max_scrypt_r": 2}],
+        [{"kdf_algorithm": "scrypt", "kdf_scrypt_n": 2**10, "kdf_scrypt_p": 2}, {"kdf_max_scrypt_p": 1}],
+    ],
+)
+def test_kdf_limits(base_image, monkeypatch, kwargs, limits):
+    stego_image = StegoCryptController(**kwargs).encode(base_image, "Hello, world!", "test")
+    reader = StegoCryptController(**limits)
+
+    # Стоимость проверяется по заголовку, до вывода ключа
+    monkeypatch.setattr(reader, "_generate_key", lambda *args: pytest.fail("key derived"))
+    with pytest.raises(ValueError, match="out of range"):
+        reader.decode(stego_image, "test")
+    with pytest.raises(ValueError, match="out of range"):
+        reader.verify(stego_image, read_payload=False)
+
+    with pytest.raises(ValueError, match="out of range"):
+        StegoCryptController(**kwargs, **limits)
+
+
+@pytest.mark.parametrize(
+    ["text", "flag"],
+    [
+        ["Hello, world!", 0x00],
+        ["Привет! Как дела? " * 100, 0x04],
+        ["Привет! Как дела? " * 20000, 0x04],
+    ],
+)
+def test_compression(text, flag):
+    stego_crypt = StegoCryptController()
+    image = Image.new("RGB", (1000, 1000))
+
+    data = stego_crypt.prepare_data(text)
+
+    assert data[0] == flag
+    assert len(data) <= 21 + len(text.encode("utf-8"))
+    assert stego_crypt.decode(stego_crypt.encode(image, text, "test"), "test") == text
+    assert stego_crypt.decode(stego_crypt.encode(image, text)) == text
+
+
+def test_compression_lzma_fallback():
+    # Сжатый zlib текст не помещается в картинку 100x100, LZMA — помещается
+    rnd = random.Random(0)
+    words = ["слово", "текст", "привет", "мир", "отпечаток", "картинка", "данные", "пароль"]
+    text = " ".join(rnd.choice(words) for _ in range(3000))
+    stego_crypt = StegoCryptController()
+
+    image = stego_crypt.encode(Image.new("RGB", (100, 100)), text)
+
+    assert lsb.LSBReader(image).read(1)[0] == 0x08
+    assert stego_crypt.decode(image) == text
+
+
+def test_decode_uncompressed():
+    text = "Привет! Как дела? " * 100
+    image = StegoCryptController(compression=False).encode(Image.new("RGB", (200, 200)), text)
+
+    assert StegoCryptController().decode(image) == text
+
+
+@pytest.mark.parametrize(["strong"], [[False], [True]])
+def test_decompress_limit(strong):
+    text = "a" * 100000
+    image = StegoCryptController().encode(Image.new("RGB", (200, 200)), text, "test")
+
+    # Нагрузка сжата в сотни раз, но распакованный текст больше предела
+    with pytest.raises(ValueError, match="size limit"):
+        StegoCryptController(max_text_bytes=50000).decode(image, "test")
+    assert StegoCryptController(max_text_bytes=100000).decode(image, "test") == text
+
+    data = StegoCryptController().prepare_data(text, strong_compression=strong)
+    with pytest.raises(ValueError, match="size limit"):
+        StegoCryptController(max_text_bytes=1000).decode(lsb.embed(Image.new("RGB", (200, 200)), data))
+
+
+def test_verify():
+    stego_crypt = StegoCryptController(kdf_iterations=1000)
+    image = stego_crypt.encode(Image.new("RGB", (200, 200)), "Hello, world!", "test")
+
+    header = stego_crypt.verify(image)
+    assert header.encrypted
+    assert stego_crypt.verify(image, "test") == header
+    with pytest.raises(InvalidToken):
+        stego_crypt.verify(image, "wrong")
+
+    # Флаги, которых нет в формате, и длина больше емкости картинки
+    for data in (bytes([0x80]) + b"\x00" * 20, bytes([0x00]) + (10**6).to_bytes(4, "big") + b"\x00" * 16):
+        with pytest.raises(ValueError):
+            stego_crypt.verify(lsb.embed(Image.new("RGB", (200, 200)), data), read_payload=False)
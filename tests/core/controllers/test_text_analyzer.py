@@ -0,0 +1,99 @@
+import collections
+import hashlib
+import time
+
+import pytest
+
+from imprint.core.controllers.text_analyzer import base
+from imprint.core.controllers.text_analyzer.base import TextAnalyzerController
+
+
+def logarithmic_hash(text: str) -> str:
+    words = text.split()
+    if not words:
+        return hashlib.md5(b"").hexdigest()
+
+    indices = [0]
+    i = 1
+    while i < len(words):
+        indices.append(i)
+        i *= 2
+    if (len(words) - 1) not in indices:
+        indices.append(len(words) - 1)
+
+    return "".join(hashlib.md5(" ".join(words[: idx + 1]).encode()).hexdigest()[:4] for idx in indices)
+
+
+@pytest.mark.parametrize(["chunk_size"], [[1], [3], [1024 * 1024]])
+@pytest.mark.parametrize(
+    ["text"],
+    [
+        [""],
+        ["   "],
+        ["Привет"],
+        ["Привет! Как дела?"],
+        ["  Привет!\n\tКак   дела?  "],
+        [" ".join(str(i) for i in range(1000))],
+    ],
+)
+def test_analyze_single_pass(monkeypatch, text, chunk_size):
+    monkeypatch.setattr(base, "CHUNK_SIZE", chunk_size)
+
+    metrics = TextAnalyzerController().analyze(text)
+
+    assert metrics.hash == logarithmic_hash(text)
+    assert metrics.chars_stats == list(collections.Counter(text).items())
+    assert metrics.symbols_count == (len(text) or 1)
+
+
+def test_analyze_stream_without_whitespace():
+    # Одно длинное слово кусками, затем пробел посреди куска
+    text = "字" * 100000 + " base64== " + "x" * 50000
+    chunks = [text[i : i + 1000] for i in range(0, len(text), 1000)]
+
+    metrics = TextAnalyzerController().analyze(iter(chunks))
+
+    assert metrics.hash == logarithmic_hash(text)
+    assert metrics.symbols_count == len(text)
+
+
+def test_analyze_stream_without_whitespace_linear():
+    analyzer = TextAnalyzerController()
+
+    def elapsed(text: str) -> float:
+        chunks = [text[i : i + 4096] for i in range(0, len(text), 4096)]
+        started = time.perf_counter()
+        analyzer.analyze(iter(chunks))
+        return time.perf_counter() - started
+
+    # Незаконченное слово не склеивается заново на каждом куске: текст без пробелов не медленнее обычного
+    size = 2_000_000
+    assert elapsed("字" * size) < 3 * elapsed("字字 " * (size // 3)) + 0.2
+
+
+@pytest.mark.parametrize("cut", [0, 1, 5, 6, 30, 299])
+def test_analyze_appended(cut):
+    analyzer = TextAnalyzerController()
+    text = "Привет, мир! " * 10 + "слово" * 5 + " конец текста  \n" * 10
+    text = text[:300]
+
+    _, checkpoint = analyzer.analyze_appended(text[:cut])
+    metrics, checkpoint = analyzer.analyze_appended(text, checkpoint)
+    expected = analyzer.analyze(text)
+
+    assert (metrics.hash, metrics.chars_stats, metrics.canvas_size, metrics.symbols_count) == (
+        expected.hash,
+        expected.chars_stats,
+        expected.canvas_size,
+        expected.symbols_count,
+    )
+    assert checkpoint.length == len(text)
+
+
+def test_analyze_appended_changed_prefix():
+    analyzer = TextAnalyzerController()
+    _, checkpoint = analyzer.analyze_appended("Hello, world!")
+
+    metrics, _ = analyzer.analyze_appended("Hello, World! And more", checkpoint)
+
+    assert metrics.hash == analyzer.analyze("Hello, World! And more").hash
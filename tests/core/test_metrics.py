@@ -0,0 +1,51 @@
+import threading
+
+from imprint.core.metrics import StageMetrics, bind, collect, collecting, server_timing, stage
+
+
+def test_stage_without_collect():
+    assert not collecting()
+    with stage("kdf"):
+        pass
+
+
+def test_collect():
+    with collect() as stages:
+        with stage("analyze"):
+            pass
+        with stage("drawer", drawer="crystal", canvas=1500):
+            pass
+
+    assert [timing.name for timing in stages] == ["analyze", "drawer"]
+    assert stages[1].labels == {"drawer": "crystal", "canvas": 1500}
+    assert server_timing(stages).startswith("analyze;dur=")
+    assert "drawer.crystal;dur=" in server_timing(stages)
+
+
+def test_bind_in_thread():
+    with collect() as stages:
+
+        def work():
+            with stage("encrypt"):
+                pass
+
+        thread = threading.Thread(target=bind(work))
+        thread.start()
+        thread.join()
+
+    assert [timing.name for timing in stages] == ["encrypt"]
+
+
+def test_stage_metrics_render():
+    with collect() as stages:
+        with stage("drawer", drawer="flow", canvas=3000):
+            pass
+
+    stage_metrics = StageMetrics()
+    stage_metrics.observe(stages)
+    stage_metrics.observe(stages)
+    text = stage_metrics.render()
+
+    assert "# TYPE imprint_stage_seconds histogram" in text
+    assert 'imprint_stage_seconds_count{canvas="4000",drawer="flow",stage="drawer"} 2' in text
+    assert 'imprint_stage_seconds_bucket{canvas="4000",drawer="flow",stage="drawer",le="+Inf"} 2' in text
@@ -0,0 +1,92 @@
+import hashlib
+import json
+from pathlib import Path
+
+from click.testing import CliRunner
+from PIL import Image
+
+from imprint.core.container import CoreContainer
+from imprint.manage.cli import cli
+from imprint.manage.render import _read_items, output_path
+
+
+def test_render_jsonl_resume(tmp_path, core_settings):
+    source = tmp_path / "texts.jsonl"
+    source.write_text(
+        "\n".join(
+            json.dumps(record)
+            for record in [{"id": "a", "text": "Hello, world!"}, {"id": "b", "text": "Привет", "password": "test"}]
+        )
+    )
+    output = tmp_path / "out"
+
+    result = CliRunner().invoke(cli, ["render", str(source), str(output), "-w", "1"])
+
+    assert result.exit_code == 0, result.output
+    assert "rendered 2, skipped 0, failed 0" in result.output
+
+    path = output_path(output, "Привет", "test")
+    imprint_controller = CoreContainer(settings=core_settings).controllers.imprint()
+    assert imprint_controller.parse(Image.open(path), "test") == "Привет"
+    assert not list(output.rglob("*.tmp"))
+
+    result = CliRunner().invoke(cli, ["render", str(source), str(output), "-w", "1"])
+
+    assert result.exit_code == 0, result.output
+    assert "rendered 0, skipped 2, failed 0" in result.output
+
+
+def test_output_path(tmp_path):
+    digest = hashlib.sha256("Привет".encode()).hexdigest()
+    assert output_path(tmp_path, "Привет") == tmp_path / digest[:2] / f"{digest}.png"
+
+    # Один текст с разными паролями — разные отпечатки
+    paths = {output_path(tmp_path, "Привет", password) for password in (None, "first", "second")}
+    assert len(paths) == 3
+
+
+def test_render_invalid_lines(tmp_path):
+    source = tmp_path / "texts.jsonl"
+    source.write_bytes(
+        b"\n".join(
+            [
+                json.dumps({"id": "a", "text": "Hello"}).encode(),
+                b"{not json",
+                b'{"text": "\xff"}',
+                json.dumps({"id": "b", "text": 1}).encode(),
+                json.dumps({"id": "c", "text": "Hello", "password": "test"}).encode(),
+            ]
+        )
+    )
+    failures = tmp_path / "failures.jsonl"
+
+    result = CliRunner().invoke(
+        cli, ["render", str(source), str(tmp_path / "out"), "-w", "1", "--failures", str(failures)]
+    )
+
+    # Битые строки учитываются как ошибки с номером строки, остальные рисуются
+    assert result.exit_code == 1, result.output
+    assert "rendered 2, skipped 0, failed 3" in result.output
+    assert [json.loads(line)["id"] for line in failures.read_text().splitlines()] == ["2", "3", "4"]
+
+
+def test_read_items_unreadable_file(tmp_path, monkeypatch):
+    (tmp_path / "a.txt").write_text("first")
+    (tmp_path / "b.txt").write_text("second")
+
+    read_text = Path.read_text
+
+    def deny(path, *args, **kwargs):
+        if path.name == "a.txt":
+            raise PermissionError(13, "Permission denied")
+        return read_text(path, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "read_text", deny)
+
+    errors = []
+    items = list(_read_items(tmp_path, on_error=lambda item_id, error: errors.append((item_id, error))))
+
+    # Нечитаемый файл уходит в ошибки, остальные обрабатываются
+    assert items == [("b.txt", "second", None)]
+    assert [item_id for item_id, _ in errors] == ["a.txt"]
+    assert errors[0][1].startswith("PermissionError")
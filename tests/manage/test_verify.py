@@ -0,0 +1,17 @@
+from click.testing import CliRunner
+from PIL import Image
+
+from imprint.manage.cli import cli
+
+
+def test_verify(tmp_path, imprint_controller):
+    imprint_controller.create("Hello, world!").save(tmp_path / "plain.png")
+    imprint_controller.create("Hello, world!", "test").save(tmp_path / "encrypted.png")
+    Image.new("RGB", (100, 100), (255, 255, 255)).save(tmp_path / "blank.png")
+
+    result = CliRunner().invoke(cli, ["verify", str(tmp_path), "-w", "1", "-p", "test"])
+
+    assert result.exit_code == 1
+    assert "FAILED" in result.output and "blank.png" in result.output
+    assert "3 files" in result.output
+    assert "2 ok (1 encrypted" in result.output